@@ -5,17 +5,36 @@ Handles secure storage, retrieval, and management of task-related file attachmen
 """
 
 import os
+import re
+import base64
+import shutil
 import logging
 import secrets
 import hashlib
+import heapq
+import zipfile
 import uuid
-from datetime import datetime
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from functools import wraps
 from pathlib import Path
-from flask import Flask, request, jsonify, send_file
+from urllib.parse import quote
+from flask import Flask, Request, Response, request, jsonify, send_file, redirect, has_request_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from sqlalchemy.dialects import postgresql, sqlite
+from werkzeug.datastructures import Headers
+from werkzeug.exceptions import ClientDisconnected
 from werkzeug.utils import secure_filename
+import boto3
+from botocore.config import Config as BotoConfig
+from botocore.exceptions import ClientError
+from celery import Celery
+from celery.schedules import crontab
+from PIL import Image, ImageOps, UnidentifiedImageError
+import fitz  # PyMuPDF, renders the first page of PDFs
+import click
 import requests
 
 # Configuration
@@ -25,21 +44,286 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY', secrets.token_hex(32))
     UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+    UPLOAD_BUFFER_SIZE = int(os.environ.get('UPLOAD_BUFFER_SIZE', 1024 * 1024))  # Write buffer for incoming files
     ALLOWED_EXTENSIONS = {'txt', 'pdf', 'png', 'jpg', 'jpeg', 'gif', 'doc', 'docx', 'xls', 'xlsx', 'ppt', 'pptx', 'zip', 'rar'}
     USER_SERVICE_URL = os.environ.get('USER_SERVICE_URL', 'http://localhost:5001')
     PROJECT_TASK_SERVICE_URL = os.environ.get('PROJECT_TASK_SERVICE_URL', 'http://localhost:5002')
     ACTIVITY_LOG_SERVICE_URL = os.environ.get('ACTIVITY_LOG_SERVICE_URL', 'http://localhost:5006')
+    MAX_BATCH_TASK_IDS = int(os.environ.get('MAX_BATCH_TASK_IDS', 10000))  # Task ids accepted by batch endpoints
+    BATCH_QUERY_CHUNK_SIZE = 1000  # Keep IN lists well under driver/SQLite parameter limits
+    BULK_DELETE_TASK_CHUNK = int(os.environ.get('BULK_DELETE_TASK_CHUNK', 100))  # Task ids deleted per transaction
+    UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024))  # Default chunk size of resumable uploads
+    MIN_UPLOAD_CHUNK_SIZE = 256 * 1024
+    MAX_RESUMABLE_UPLOAD_SIZE = int(os.environ.get('MAX_RESUMABLE_UPLOAD_SIZE', 5 * 1024 ** 3))  # 5GB
+    UPLOAD_SESSION_TTL_HOURS = int(os.environ.get('UPLOAD_SESSION_TTL_HOURS', 24))  # Idle sessions expired by `flask expire-upload-sessions`
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'local')  # 'local' (UPLOAD_FOLDER) or 's3'
+    S3_BUCKET = os.environ.get('S3_BUCKET', 'attachments')
+    # Empty values (compose passes ${VAR:-} through) count as unset so boto3 keeps its defaults and credential chain
+    S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL') or None  # e.g. http://minio:9000; unset for AWS
+    S3_PUBLIC_ENDPOINT_URL = os.environ.get('S3_PUBLIC_ENDPOINT_URL') or None  # Host clients use in presigned URLs, if different
+    S3_REGION = os.environ.get('S3_REGION', 'us-east-1')
+    S3_ACCESS_KEY_ID = os.environ.get('S3_ACCESS_KEY_ID') or None
+    S3_SECRET_ACCESS_KEY = os.environ.get('S3_SECRET_ACCESS_KEY') or None
+    PRESIGNED_URL_EXPIRY = int(os.environ.get('PRESIGNED_URL_EXPIRY', 900))  # Seconds
+    DOWNLOAD_MODE = os.environ.get('DOWNLOAD_MODE', 'direct')  # 'direct' (send_file) or 'x-accel' (nginx serves the bytes)
+    X_ACCEL_LOCATION = os.environ.get('X_ACCEL_LOCATION', '/protected-uploads/')  # Internal nginx location aliased to UPLOAD_FOLDER
+    DEDUPE_BATCH_SIZE = 500  # Attachments updated per transaction by `flask dedupe-attachments` / `rebuild-attachment-stats`
+    # Look for files at their pre-sharding flat location too; disable once `flask shard-uploads` has finished
+    UPLOAD_FLAT_FALLBACK = os.environ.get('UPLOAD_FLAT_FALLBACK', 'true').lower() in ['true', '1']
+    
+    # Celery for thumbnail/preview generation
+    CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/6')
+    CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', 'redis://localhost:6379/6')
+    PREVIEW_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf'}
+    PREVIEW_SIZES = {'thumbnail': 256, 'preview': 1024}  # Longest side in pixels
+    PREVIEW_MAX_PIXELS = int(os.environ.get('PREVIEW_MAX_PIXELS', 64_000_000))  # Larger images are not decoded
+    PREVIEW_CACHE_MAX_AGE = 365 * 24 * 3600  # Previews of a blob never change
+    
+    # Task attachment archives (streamed ZIP)
+    ARCHIVE_STORED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf', 'zip', 'rar', 'docx', 'xlsx', 'pptx'}  # Already compressed
+    ARCHIVE_READ_SIZE = 1024 * 1024  # Bytes read from storage per archive chunk
+    
+    # Nightly upload folder reconciliation (orphan files, attachments whose file is gone)
+    RECONCILE_REMOVE_ORPHANS = os.environ.get('RECONCILE_REMOVE_ORPHANS', 'false').lower() in ['true', '1']  # Otherwise only reported
+    RECONCILE_GRACE_MINUTES = int(os.environ.get('RECONCILE_GRACE_MINUTES', 60))  # Younger files may belong to uploads still committing
+    RECONCILE_BATCH_SIZE = 1000  # Rows fetched per server-side cursor round trip / records marked per transaction
+
+INCOMING_DIR = '.incoming'  # Same filesystem as the final files, so completing an upload is an atomic rename
+PREVIEW_FILE_PATTERN = re.compile(r'^([0-9a-f]{64})\.[a-z]+\.jpg$')  # preview_key() names
+
+class HashingFileWriter:
+    """File in the upload folder that computes the SHA-256 and size of everything written to it"""
+    
+    def __init__(self, path: str, buffer_size: int):
+        self.path = path
+        self.file = open(path, 'w+b', buffering=buffer_size)
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+    
+    def write(self, data):
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.file.write(data)
+    
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+class AttachmentRequest(Request):
+    """Request that streams uploaded files straight into the upload folder instead of a spooled temp file"""
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        writer = HashingFileWriter(
+            os.path.join(app.config['UPLOAD_FOLDER'], INCOMING_DIR, f"{uuid.uuid4()}.partial"),
+            app.config['UPLOAD_BUFFER_SIZE']
+        )
+        self.__dict__.setdefault('incoming_files', []).append(writer)
+        return writer
+    
+    def close(self):
+        super().close()
+        # Anything not moved into place by the view is an aborted or rejected upload
+        for writer in self.__dict__.get('incoming_files', []):
+            writer.file.close()
+            if os.path.exists(writer.path):
+                os.remove(writer.path)
+
+def sharded_path(root: str, name: str) -> str:
+    """Two levels of name-prefix directories (<root>/ab/cd/abcd...), at most 256 entries per level"""
+    return os.path.join(root, name[:2], name[2:4], name)
+
+def local_upload_path(root: str, name: str, flat_fallback: bool) -> str:
+    """Where a stored file lives: its shard, or its old flat location while `flask shard-uploads` is pending"""
+    path = sharded_path(root, name)
+    if flat_fallback and not os.path.exists(path):
+        flat_path = os.path.join(root, name)
+        if os.path.exists(flat_path):
+            return flat_path
+    return path
+
+class LocalStorage:
+    """Blobs stored as files under UPLOAD_FOLDER, fanned out into hash-prefix directories"""
+    name = 'local'
+    supports_presigned = False
+    
+    def __init__(self, root: str, flat_fallback: bool = True):
+        self.root = root
+        self.flat_fallback = flat_fallback
+    
+    def path(self, key: str):
+        if key.startswith(INCOMING_DIR + '/'):
+            return os.path.join(self.root, key)
+        return local_upload_path(self.root, key, self.flat_fallback)
+    
+    def target_path(self, key: str):
+        """Path a new file for key is written to (its shard directory is created on demand)"""
+        if key.startswith(INCOMING_DIR + '/'):
+            return os.path.join(self.root, key)
+        path = sharded_path(self.root, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+    
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+    
+    def put_file(self, local_path: str, key: str, keep_source: bool = False):
+        """Store a local file under key; the local file is consumed unless keep_source"""
+        if not keep_source:
+            os.replace(local_path, self.target_path(key))
+            return
+        try:
+            os.link(local_path, self.target_path(key))
+        except OSError:
+            shutil.copyfile(local_path, self.target_path(key))
+    
+    def copy(self, source_key: str, key: str):
+        shutil.copyfile(self.path(source_key), self.target_path(key))
+    
+    def open(self, key: str):
+        return open(self.path(key), 'rb')
+    
+    def stat(self, key: str):
+        """Return (size, base64 SHA-256 checksum or None), or None if the key does not exist"""
+        try:
+            return os.path.getsize(self.path(key)), None
+        except FileNotFoundError:
+            return None
+    
+    def delete(self, key: str):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+    
+    def stash(self, key: str) -> str:
+        """Move a blob aside (restorable with unstash) and return its stash key"""
+        stash_key = f"{INCOMING_DIR}/{key}.{uuid.uuid4()}.released"
+        os.replace(self.path(key), self.path(stash_key))
+        return stash_key
+    
+    def unstash(self, stash_key: str, key: str):
+        os.replace(self.path(stash_key), self.target_path(key))
+
+class S3Storage:
+    """Blobs stored in an S3-compatible bucket (AWS S3, MinIO, ...); clients can transfer via presigned URLs"""
+    name = 's3'
+    supports_presigned = True
+    
+    def __init__(self, bucket: str, endpoint_url: str = None, public_endpoint_url: str = None, region: str = None,
+                 access_key_id: str = None, secret_access_key: str = None):
+        self.bucket = bucket
+        options = {
+            'region_name': region,
+            'aws_access_key_id': access_key_id,
+            'aws_secret_access_key': secret_access_key,
+            'config': BotoConfig(signature_version='s3v4', s3={'addressing_style': 'path'})
+        }
+        self.client = boto3.client('s3', endpoint_url=endpoint_url, **options)
+        # Presigned URLs must name the host clients reach, which may differ from the in-network endpoint
+        self.presign_client = boto3.client('s3', endpoint_url=public_endpoint_url, **options) \
+            if public_endpoint_url else self.client
+    
+    def path(self, key: str):
+        return None
+    
+    def exists(self, key: str) -> bool:
+        return self.stat(key) is not None
+    
+    def put_file(self, local_path: str, key: str, keep_source: bool = False):
+        """Store a local file under key; the local file is consumed unless keep_source"""
+        self.client.upload_file(local_path, self.bucket, key)
+        if not keep_source:
+            os.remove(local_path)
+    
+    def copy(self, source_key: str, key: str):
+        self.client.copy_object(Bucket=self.bucket, Key=key, CopySource={'Bucket': self.bucket, 'Key': source_key})
+    
+    def open(self, key: str):
+        return self.client.get_object(Bucket=self.bucket, Key=key)['Body']
+    
+    def stat(self, key: str):
+        """Return (size, base64 SHA-256 checksum or None), or None if the key does not exist"""
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=key, ChecksumMode='ENABLED')
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+        return head['ContentLength'], head.get('ChecksumSHA256')
+    
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+    
+    def stash(self, key: str) -> str:
+        """Move a blob aside (restorable with unstash) and return its stash key"""
+        stash_key = f"{INCOMING_DIR}/{key}.{uuid.uuid4()}.released"
+        self.copy(key, stash_key)
+        self.delete(key)
+        return stash_key
+    
+    def unstash(self, stash_key: str, key: str):
+        self.copy(stash_key, key)
+        self.delete(stash_key)
+    
+    def presigned_upload(self, key: str, sha256_hex: str, size: int, expires_in: int):
+        """Return (url, headers the client must send); the store rejects a body that does not match the checksum"""
+        checksum = base64.b64encode(bytes.fromhex(sha256_hex)).decode()
+        url = self.presign_client.generate_presigned_url('put_object', Params={
+            'Bucket': self.bucket,
+            'Key': key,
+            'ContentLength': size,
+            'ChecksumSHA256': checksum
+        }, ExpiresIn=expires_in)
+        return url, {'Content-Length': str(size), 'x-amz-checksum-sha256': checksum}
+    
+    def presigned_download_url(self, key: str, download_name: str, mimetype: str, expires_in: int) -> str:
+        disposition = Headers()
+        disposition.set('Content-Disposition', 'attachment', filename=download_name)
+        return self.presign_client.generate_presigned_url('get_object', Params={
+            'Bucket': self.bucket,
+            'Key': key,
+            'ResponseContentDisposition': disposition['Content-Disposition'],
+            'ResponseContentType': mimetype
+        }, ExpiresIn=expires_in)
+
+def create_storage(config):
+    """Build the blob store selected by STORAGE_BACKEND"""
+    if config['STORAGE_BACKEND'] == 's3':
+        return S3Storage(
+            config['S3_BUCKET'],
+            endpoint_url=config['S3_ENDPOINT_URL'],
+            public_endpoint_url=config['S3_PUBLIC_ENDPOINT_URL'],
+            region=config['S3_REGION'],
+            access_key_id=config['S3_ACCESS_KEY_ID'],
+            secret_access_key=config['S3_SECRET_ACCESS_KEY']
+        )
+    return LocalStorage(config['UPLOAD_FOLDER'], config['UPLOAD_FLAT_FALLBACK'])
 
 # Application setup
 app = Flask(__name__)
 app.config.from_object(Config)
+app.request_class = AttachmentRequest
 
 # Ensure upload directory exists
 Path(app.config['UPLOAD_FOLDER']).mkdir(exist_ok=True)
+Path(app.config['UPLOAD_FOLDER'], INCOMING_DIR).mkdir(exist_ok=True)
+
+storage = create_storage(app.config)
+Image.MAX_IMAGE_PIXELS = app.config['PREVIEW_MAX_PIXELS']
 
 db = SQLAlchemy(app)
 migrate = Migrate(app, db)
 
+# Celery setup
+celery = Celery(app.name, broker=app.config['CELERY_BROKER_URL'])
+celery.conf.update(app.config)
+
+class FlaskCeleryTask(celery.Task):
+    def __call__(self, *args, **kwargs):
+        with app.app_context():
+            return self.run(*args, **kwargs)
+
+celery.Task = FlaskCeleryTask
+
 # Logging setup
 logging.basicConfig(
     level=logging.INFO,
@@ -54,13 +338,19 @@ logger = logging.getLogger(__name__)
 # Models
 class Attachment(db.Model):
     __tablename__ = 'attachments'
+    __table_args__ = (
+        db.Index('ix_attachments_task_id_created_at', 'task_id', 'created_at'),  # Per-task listings and counts
+        db.Index('ix_attachments_filename', 'filename'),  # Lookups by stored name during storage reconciliation
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     filename = db.Column(db.String(255), nullable=False)  # Stored unique filename
     original_filename = db.Column(db.String(255), nullable=False)
-    file_size = db.Column(db.Integer)
+    file_size = db.Column(db.BigInteger)
     mime_type = db.Column(db.String(100))
     file_hash = db.Column(db.String(64))  # SHA-256 hash
+    extension = db.Column(db.String(20))  # Lower-cased, from original_filename; counted in attachment_type_stats
+    missing_at = db.Column(db.DateTime)  # Set by storage reconciliation when the stored file is gone
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     task_id = db.Column(db.Integer, nullable=False)  # Reference to project-task service
     uploaded_by = db.Column(db.Integer, nullable=False)  # Reference to user service
@@ -75,23 +365,704 @@ class Attachment(db.Model):
             'file_hash': self.file_hash,
             'created_at': self.created_at.isoformat(),
             'task_id': self.task_id,
-            'uploaded_by': self.uploaded_by
+            'uploaded_by': self.uploaded_by,
+            'file_missing': self.missing_at is not None
+        }
+    
+    @property
+    def content_addressed(self):
+        """Stored as a shared blob named by its hash (older uploads have their own uuid-named file)"""
+        return self.file_hash is not None and self.filename == self.file_hash
+
+class AttachmentBlob(db.Model):
+    """One stored file per distinct SHA-256, shared by every attachment with that content"""
+    __tablename__ = 'attachment_blobs'
+    
+    file_hash = db.Column(db.String(64), primary_key=True)
+    file_size = db.Column(db.BigInteger, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    preview_status = db.Column(db.String(20))  # pending, ready, failed, unsupported
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class AttachmentTypeStat(db.Model):
+    """Running attachment count and size per file extension, kept in step with the attachments table"""
+    __tablename__ = 'attachment_type_stats'
+    
+    extension = db.Column(db.String(20), primary_key=True)  # '' for files without one
+    attachment_count = db.Column(db.BigInteger, nullable=False, default=0)
+    total_size = db.Column(db.BigInteger, nullable=False, default=0)
+
+class UploadSession(db.Model):
+    """Resumable upload: chunks are written in place into a staging file until the session is completed"""
+    __tablename__ = 'upload_sessions'
+    
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    task_id = db.Column(db.Integer, nullable=False)
+    uploaded_by = db.Column(db.Integer, nullable=False, index=True)
+    original_filename = db.Column(db.String(255), nullable=False)
+    mime_type = db.Column(db.String(100))
+    total_size = db.Column(db.BigInteger, nullable=False)
+    chunk_size = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='open')  # open, completing, completed, aborted
+    direct = db.Column(db.Boolean, nullable=False, default=False)  # Client PUTs the whole file to a presigned URL
+    expected_hash = db.Column(db.String(64))  # SHA-256 declared for direct uploads
+    attachment_id = db.Column(db.Integer)
+    error_message = db.Column(db.Text)  # Why the last completion attempt failed
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    chunks = db.relationship('UploadChunk', backref='session', cascade='all, delete-orphan', lazy='dynamic')
+    
+    @property
+    def chunk_count(self):
+        return -(-self.total_size // self.chunk_size)
+    
+    def chunk_length(self, index: int):
+        return min(self.chunk_size, self.total_size - index * self.chunk_size)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'task_id': self.task_id,
+            'uploaded_by': self.uploaded_by,
+            'original_filename': self.original_filename,
+            'mime_type': self.mime_type,
+            'total_size': self.total_size,
+            'chunk_size': self.chunk_size,
+            'chunk_count': self.chunk_count,
+            'status': self.status,
+            'direct': self.direct,
+            'attachment_id': self.attachment_id,
+            'error_message': self.error_message,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+class UploadChunk(db.Model):
+    __tablename__ = 'upload_chunks'
+    
+    session_id = db.Column(db.String(36), db.ForeignKey('upload_sessions.id', ondelete='CASCADE'), primary_key=True)
+    chunk_index = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    sha256 = db.Column(db.String(64), nullable=False)
+    received_at = db.Column(db.DateTime, default=datetime.utcnow)
+
 # Utility functions
+def parse_task_ids(data):
+    """Validate the task_ids list of a batch request; returns (unique ids, error response)"""
+    task_ids = data.get('task_ids') if data else None
+    if not isinstance(task_ids, list) or not task_ids:
+        return None, (jsonify({'error': 'task_ids must be a non-empty list'}), 400)
+    if len(task_ids) > app.config['MAX_BATCH_TASK_IDS']:
+        return None, (jsonify({'error': f"At most {app.config['MAX_BATCH_TASK_IDS']} task_ids per request"}), 400)
+    try:
+        return sorted({int(task_id) for task_id in task_ids}), None
+    except (TypeError, ValueError):
+        return None, (jsonify({'error': 'task_ids must be integers'}), 400)
+
 def allowed_file(filename):
     """Check if file extension is allowed"""
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
 
+def file_extension(filename: str) -> str:
+    """Extension recorded for statistics ('' when the name has none)"""
+    if not filename or '.' not in filename:
+        return ''
+    return filename.rsplit('.', 1)[1].lower()[:20]
+
 def calculate_file_hash(file_path):
     """Calculate SHA-256 hash of a file"""
     sha256_hash = hashlib.sha256()
     with open(file_path, "rb") as f:
-        for byte_block in iter(lambda: f.read(4096), b""):
+        for byte_block in iter(lambda: f.read(1024 * 1024), b""):
             sha256_hash.update(byte_block)
     return sha256_hash.hexdigest()
 
+def receive_upload(file):
+    """Finish writing an upload under .incoming; returns (path, sha256 hex digest, size)"""
+    writer = file.stream
+    if not isinstance(writer, HashingFileWriter):
+        # Small in-memory parts (or a non-default request class): fall back to save + hash
+        path = os.path.join(app.config['UPLOAD_FOLDER'], INCOMING_DIR, f"{uuid.uuid4()}.partial")
+        file.save(path)
+        return path, calculate_file_hash(path), os.path.getsize(path)
+    
+    writer.file.flush()
+    os.fsync(writer.file.fileno())
+    writer.file.close()
+    return writer.path, writer.sha256.hexdigest(), writer.size
+
+def attachment_file_path(attachment):
+    """Location of an attachment's bytes on local disk (None when its blob lives in remote storage)"""
+    if attachment.content_addressed:
+        return storage.path(attachment.file_hash)
+    # Files uploaded before content addressing always stay on local disk
+    return local_upload_path(app.config['UPLOAD_FOLDER'], attachment.filename, app.config['UPLOAD_FLAT_FALLBACK'])
+
+def store_attachment(attachment, incoming_path: str = None, staged_key: str = None, keep_on_failure: bool = False):
+    """Commit a new attachment (plus anything else pending in the session) with its received bytes
+    
+    The bytes are either a local file (incoming_path) or an object already in storage (staged_key).
+    Files are stored once per content hash; when the hash is already stored only a reference is added
+    and the received copy is discarded. With keep_on_failure the received copy survives a failed commit
+    (an upload session that can be completed again). Returns True if the blob was written.
+    """
+    attachment.extension = file_extension(attachment.original_filename)
+    db.session.add(attachment)
+    written = False
+    stored = False
+    try:
+        adjust_type_stats({attachment.extension: (1, attachment.file_size or 0)})
+        # The upsert row-locks the blob until commit, so a concurrent release cannot remove it in between
+        ref_count = add_blob_reference(attachment.file_hash, attachment.file_size, attachment.original_filename)
+        if ref_count == 1 or not storage.exists(attachment.file_hash):
+            if staged_key:
+                storage.copy(staged_key, attachment.file_hash)
+            else:
+                storage.put_file(incoming_path, attachment.file_hash)
+            written = True
+        db.session.commit()
+        stored = True
+    except Exception:
+        if written:
+            storage.delete(attachment.file_hash)
+        raise
+    finally:
+        if stored or not keep_on_failure:
+            if incoming_path and os.path.exists(incoming_path):
+                os.remove(incoming_path)
+            if staged_key:
+                storage.delete(staged_key)
+    
+    if not written:
+        logger.info(f"Upload of {attachment.original_filename} matched stored blob {attachment.file_hash}; write skipped")
+    elif previewable(attachment.original_filename):
+        queue_previews(attachment.file_hash)
+    return written
+
+def upload_staging_key(upload):
+    return f"{INCOMING_DIR}/{upload.id}.upload"
+
+def upload_staging_path(upload):
+    return os.path.join(app.config['UPLOAD_FOLDER'], upload_staging_key(upload))
+
+def received_ranges(upload):
+    """Merge the received chunks of an upload into [start, end) byte ranges"""
+    ranges = []
+    for (index,) in db.session.query(UploadChunk.chunk_index).filter_by(
+        session_id=upload.id
+    ).order_by(UploadChunk.chunk_index):
+        start = index * upload.chunk_size
+        end = start + upload.chunk_length(index)
+        if ranges and ranges[-1][1] == start:
+            ranges[-1][1] = end
+        else:
+            ranges.append([start, end])
+    return ranges
+
+def upload_progress(upload):
+    """Session details plus what has been received so far"""
+    ranges = received_ranges(upload)
+    upload_dict = upload.to_dict()
+    upload_dict['received_ranges'] = ranges
+    upload_dict['received_bytes'] = sum(end - start for start, end in ranges)
+    return upload_dict
+
+def load_own_upload(upload_id: str):
+    """Return (upload session, error response) for a session of the current user"""
+    upload = UploadSession.query.get(upload_id)
+    if not upload or upload.uploaded_by != request.current_user['id']:
+        return None, (jsonify({'error': 'Upload session not found'}), 404)
+    return upload, None
+
+def parse_new_upload(data):
+    """Validate the common fields of an upload session request; returns ((task_id, filename, total_size), error)"""
+    if not data or not data.get('task_id') or not data.get('filename') or not data.get('total_size'):
+        return None, (jsonify({'error': 'task_id, filename and total_size are required'}), 400)
+    
+    try:
+        task_id = int(data['task_id'])
+        total_size = int(data['total_size'])
+    except (TypeError, ValueError):
+        return None, (jsonify({'error': 'task_id and total_size must be integers'}), 400)
+    
+    if not allowed_file(data['filename']):
+        return None, (jsonify({'error': f'File type not allowed. Allowed extensions: {", ".join(app.config["ALLOWED_EXTENSIONS"])}'}), 400)
+    
+    if not 0 < total_size <= app.config['MAX_RESUMABLE_UPLOAD_SIZE']:
+        return None, (jsonify({'error': f"total_size must be between 1 and {app.config['MAX_RESUMABLE_UPLOAD_SIZE']} bytes"}), 400)
+    
+    return (task_id, secure_filename(data['filename']), total_size), None
+
+def discard_upload(upload):
+    """Abort an open upload session and remove its staged bytes"""
+    upload.status = 'aborted'
+    upload.chunks.delete(synchronize_session=False)
+    db.session.commit()
+    if upload.direct:
+        storage.delete(upload_staging_key(upload))
+        return
+    staging_path = upload_staging_path(upload)
+    if os.path.exists(staging_path):
+        os.remove(staging_path)
+
+def claim_upload(upload) -> bool:
+    """Move an open upload session to 'completing'; False if another request got there first"""
+    claimed = UploadSession.query.filter_by(id=upload.id, status='open').update(
+        {'status': 'completing', 'error_message': None, 'updated_at': datetime.utcnow()}, synchronize_session=False
+    )
+    db.session.commit()
+    return claimed == 1
+
+def release_upload(upload_id: str, error: str):
+    """Hand a session that failed to complete back to its client, keeping the received chunks"""
+    UploadSession.query.filter_by(id=upload_id, status='completing').update(
+        {'status': 'open', 'error_message': error}, synchronize_session=False
+    )
+    db.session.commit()
+
+def staged_object_sha256(key: str, size: int, checksum: str):
+    """SHA-256 hex digest of a staged object, from the store's own checksum when it keeps one"""
+    if checksum:
+        return base64.b64decode(checksum).hex()
+    sha256 = hashlib.sha256()
+    body = storage.open(key)
+    for block in iter(lambda: body.read(1024 * 1024), b''):
+        sha256.update(block)
+    return sha256.hexdigest()
+
+def presigned_download_url(attachment) -> str:
+    return storage.presigned_download_url(
+        attachment.file_hash,
+        attachment.original_filename,
+        attachment.mime_type or 'application/octet-stream',
+        app.config['PRESIGNED_URL_EXPIRY']
+    )
+
+def accel_redirect_response(file_path: str, download_name: str, mimetype: str):
+    """Hand the transfer to nginx: an empty response whose X-Accel-Redirect points at the internal location"""
+    relative_path = os.path.relpath(file_path, app.config['UPLOAD_FOLDER']).replace(os.sep, '/')
+    response = Response(mimetype=mimetype)
+    response.headers['X-Accel-Redirect'] = app.config['X_ACCEL_LOCATION'].rstrip('/') + '/' + quote(relative_path)
+    response.headers.set('Content-Disposition', 'attachment', filename=download_name)
+    return response
+
+def add_blob_reference(file_hash: str, file_size: int, filename: str = None) -> int:
+    """Count one more attachment against a blob within the current transaction; returns the new ref_count
+    
+    The upsert row-locks the blob until commit, so a concurrent release cannot unlink it in between.
+    A new blob is marked for preview generation when filename has a previewable extension.
+    """
+    dialect_insert = postgresql.insert if db.engine.dialect.name == 'postgresql' else sqlite.insert
+    statement = dialect_insert(AttachmentBlob).values(
+        file_hash=file_hash,
+        file_size=file_size,
+        ref_count=1,
+        preview_status='pending' if filename and previewable(filename) else 'unsupported',
+        created_at=datetime.utcnow()
+    )
+    return db.session.execute(statement.on_conflict_do_update(
+        index_elements=['file_hash'],
+        set_={'ref_count': AttachmentBlob.ref_count + 1}
+    ).returning(AttachmentBlob.ref_count)).scalar_one()
+
+def adjust_type_stats(changes: dict):
+    """Apply {extension: (count delta, size delta)} to attachment_type_stats within the current transaction"""
+    dialect_insert = postgresql.insert if db.engine.dialect.name == 'postgresql' else sqlite.insert
+    # Fixed order so concurrent multi-extension updates lock rows consistently
+    for extension in sorted(changes):
+        count, size = changes[extension]
+        statement = dialect_insert(AttachmentTypeStat).values(
+            extension=extension, attachment_count=count, total_size=size
+        )
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=['extension'],
+            set_={
+                'attachment_count': AttachmentTypeStat.attachment_count + count,
+                'total_size': AttachmentTypeStat.total_size + size
+            }
+        ))
+
+def removed_type_stats(attachments) -> dict:
+    """Negative adjust_type_stats changes for attachments about to be deleted"""
+    changes = {}
+    for attachment in attachments:
+        if attachment.extension is None:
+            continue  # Not counted yet (pre-dates the stats table and rebuild-attachment-stats has not run)
+        count, size = changes.get(attachment.extension, (0, 0))
+        changes[attachment.extension] = (count - 1, size - (attachment.file_size or 0))
+    return changes
+
+def release_blob_references(hash_counts: dict) -> list:
+    """Drop references to blobs within the current transaction
+    
+    Blobs whose last reference goes away are deleted and their bytes stashed aside while the rows are
+    locked; returns [(blob key, stash key)] for discard_released_blobs/restore_released_blobs.
+    """
+    released = []
+    blobs = AttachmentBlob.query.filter(
+        AttachmentBlob.file_hash.in_(list(hash_counts))
+    ).order_by(AttachmentBlob.file_hash).with_for_update().all()
+    
+    for blob in blobs:
+        blob.ref_count -= hash_counts[blob.file_hash]
+        if blob.ref_count > 0:
+            continue
+        db.session.delete(blob)
+        if storage.exists(blob.file_hash):
+            released.append((blob.file_hash, storage.stash(blob.file_hash)))
+        else:
+            logger.warning(f"Blob not found in {storage.name} storage during release: {blob.file_hash}")
+    
+    db.session.flush()
+    return released
+
+def discard_released_blobs(released: list) -> int:
+    """Remove released blobs (and their previews) once the transaction that released them has committed"""
+    removed = 0
+    for key, stash_key in released:
+        try:
+            storage.delete(stash_key)
+            for size in app.config['PREVIEW_SIZES']:
+                storage.delete(preview_key(key, size))
+            removed += 1
+        except Exception as e:
+            logger.error(f"Failed to delete released blob {stash_key}: {e}")
+    return removed
+
+def restore_released_blobs(released: list):
+    """Put released blobs back after the transaction that released them was rolled back"""
+    for key, stash_key in released:
+        storage.unstash(stash_key, key)
+
+def delete_task_attachments(task_ids: list):
+    """Delete the attachments of a chunk of tasks in one transaction; returns (attachments, files) deleted"""
+    attachments = Attachment.query.filter(Attachment.task_id.in_(task_ids)).all()
+    
+    # Delete legacy (one file per attachment) files from disk
+    deleted_files = 0
+    hash_counts = {}
+    for attachment in attachments:
+        if attachment.content_addressed:
+            hash_counts[attachment.file_hash] = hash_counts.get(attachment.file_hash, 0) + 1
+            continue
+        file_path = attachment_file_path(attachment)
+        if os.path.exists(file_path):
+            try:
+                os.remove(file_path)
+                deleted_files += 1
+            except Exception as e:
+                logger.error(f"Failed to delete file {file_path}: {e}")
+    
+    # Delete database records; shared blobs go only when no other task still references them
+    deleted_count = Attachment.query.filter(Attachment.task_id.in_(task_ids)).delete(synchronize_session=False)
+    if attachments:
+        adjust_type_stats(removed_type_stats(attachments))
+    released = []
+    try:
+        if hash_counts:
+            released = release_blob_references(hash_counts)
+        db.session.commit()
+    except Exception:
+        restore_released_blobs(released)
+        raise
+    deleted_files += discard_released_blobs(released)
+    return deleted_count, deleted_files
+
+def previewable(filename: str) -> bool:
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in app.config['PREVIEW_EXTENSIONS']
+
+def preview_key(file_hash: str, size: str) -> str:
+    """Previews are stored next to their blob"""
+    return f"{file_hash}.{size}.jpg"
+
+def queue_previews(file_hash: str):
+    """Queue preview generation; a broker outage leaves the blob pending for `flask queue-previews`"""
+    try:
+        generate_attachment_previews.delay(file_hash)
+    except Exception as e:
+        logger.error(f"Failed to queue previews for blob {file_hash}: {e}")
+
+@contextmanager
+def blob_local_copy(file_hash: str):
+    """Yield a local path holding the blob's bytes (downloaded to .incoming for remote storage)"""
+    path = storage.path(file_hash)
+    if path:
+        yield path
+        return
+    
+    path = os.path.join(app.config['UPLOAD_FOLDER'], INCOMING_DIR, f"{uuid.uuid4()}.preview-source")
+    try:
+        with open(path, 'wb') as local_copy:
+            shutil.copyfileobj(storage.open(file_hash), local_copy, 1024 * 1024)
+        yield path
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+def load_preview_source(path: str):
+    """First frame of a PNG/JPEG/GIF or first page of a PDF as an RGB image; None if not previewable"""
+    largest = max(app.config['PREVIEW_SIZES'].values())
+    with open(path, 'rb') as f:
+        is_pdf = f.read(5) == b'%PDF-'
+    
+    if is_pdf:
+        with fitz.open(path) as document:
+            page = document.load_page(0)
+            zoom = largest / max(page.rect.width, page.rect.height)
+            pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+            return Image.frombytes('RGB', (pixmap.width, pixmap.height), pixmap.samples)
+    
+    try:
+        image = Image.open(path, formats=('PNG', 'JPEG', 'GIF'))
+    except UnidentifiedImageError:
+        return None
+    image.draft('RGB', (largest, largest))  # Let JPEG decode at reduced scale
+    image = ImageOps.exif_transpose(image)
+    
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        flattened = Image.new('RGB', image.size, 'white')
+        flattened.paste(image, mask=image.getchannel('A'))
+        return flattened
+    return image.convert('RGB')
+
+class ZipStreamBuffer:
+    """Write-only, unseekable file object for zipfile; drain() hands over what was written since the last call"""
+    
+    def __init__(self):
+        self.chunks = []
+    
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+    
+    def flush(self):
+        pass
+    
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+def open_attachment(attachment):
+    """Readable binary stream of an attachment's bytes, from local disk or remote storage"""
+    if attachment.content_addressed:
+        return storage.open(attachment.file_hash)
+    return open(attachment_file_path(attachment), 'rb')
+
+def attachment_available(attachment) -> bool:
+    if attachment.content_addressed:
+        return storage.exists(attachment.file_hash)
+    return os.path.exists(attachment_file_path(attachment))
+
+def archive_member_names(attachments) -> list:
+    """Names for attachments inside an archive, numbering repeats like 'report (2).pdf'"""
+    names = []
+    seen = set()
+    for attachment in attachments:
+        stem, dot, extension = attachment.original_filename.rpartition('.')
+        if not dot:
+            stem, extension = extension, ''
+        name = attachment.original_filename
+        copy = 1
+        while name.lower() in seen:
+            copy += 1
+            name = f"{stem} ({copy}){dot}{extension}"
+        seen.add(name.lower())
+        names.append(name)
+    return names
+
+def stream_zip(members):
+    """Yield a ZIP archive of (name, attachment) members as it is built, holding one read chunk at a time
+    
+    Already-compressed types are stored; the rest are deflated. The output is never seeked, so sizes and
+    checksums go into data descriptors after each member.
+    """
+    buffer = ZipStreamBuffer()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for name, attachment in members:
+            info = zipfile.ZipInfo(name, date_time=(attachment.created_at or datetime.utcnow()).timetuple()[:6])
+            info.external_attr = 0o644 << 16
+            stored = (attachment.extension or file_extension(attachment.original_filename)) in app.config['ARCHIVE_STORED_EXTENSIONS']
+            info.compress_type = zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED
+            info.file_size = attachment.file_size or 0
+            
+            with open_attachment(attachment) as source, \
+                    archive.open(info, 'w', force_zip64=attachment.file_size is None) as member:
+                for block in iter(lambda: source.read(app.config['ARCHIVE_READ_SIZE']), b''):
+                    member.write(block)
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            yield buffer.drain()  # Rest of the compressed data and the member's data descriptor
+    yield buffer.drain()  # Central directory, written on close
+
+def shard_directories(path: str) -> list:
+    """Sorted paths of the shard subdirectories of path (dot entries such as .incoming are not shards)"""
+    with os.scandir(path) as entries:
+        return sorted(
+            entry.path for entry in entries
+            if not entry.name.startswith('.') and entry.is_dir(follow_symlinks=False)
+        )
+
+def stored_files(root: str):
+    """Yield (name, path) of every file under the shard directories of root, in name order
+    
+    Only one leaf directory is listed and sorted at a time, so memory is bounded by the size of a
+    shard rather than by the number of stored files.
+    """
+    for first in shard_directories(root):
+        for second in shard_directories(first):
+            with os.scandir(second) as entries:
+                names = sorted(entry.name for entry in entries if entry.is_file(follow_symlinks=False))
+            for name in names:
+                yield name, os.path.join(second, name)
+
+def stored_keys(connection, batch_size: int):
+    """Yield the storage key of every blob and legacy attachment file in name order
+    
+    Both tables are read through server-side cursors (yield_per) and merged, ordered by code point
+    like the file names from stored_files.
+    """
+    def by_name(column):
+        return column.collate('C') if connection.dialect.name == 'postgresql' else column
+    
+    streamed = connection.execution_options(yield_per=batch_size)
+    blobs = streamed.execute(
+        db.select(AttachmentBlob.file_hash).order_by(by_name(AttachmentBlob.file_hash))
+    ).scalars()
+    legacy = streamed.execute(
+        db.select(Attachment.filename).where(
+            db.or_(Attachment.file_hash.is_(None), Attachment.filename != Attachment.file_hash)
+        ).order_by(by_name(Attachment.filename))
+    ).scalars()
+    return heapq.merge(blobs, legacy)
+
+def storage_key_referenced(name: str) -> bool:
+    """Point lookup confirming a file found during reconciliation still belongs to a blob or attachment"""
+    preview = PREVIEW_FILE_PATTERN.match(name)
+    if preview:
+        return db.session.get(AttachmentBlob, preview.group(1)) is not None
+    return db.session.get(AttachmentBlob, name) is not None or \
+        db.session.query(Attachment.query.filter_by(filename=name).exists()).scalar()
+
+def mark_missing_files(keys: list) -> int:
+    """Flag the attachments stored under keys as missing their file; returns the number newly flagged"""
+    keys = [key for key in keys if not storage.exists(key)]  # Re-check: the scan saw an older state
+    if not keys:
+        return 0
+    marked = Attachment.query.filter(
+        Attachment.filename.in_(keys),
+        Attachment.missing_at.is_(None)
+    ).update({'missing_at': datetime.utcnow()}, synchronize_session=False)
+    db.session.commit()
+    for key in keys:
+        logger.warning(f"Stored file missing for attachments stored as {key}")
+    return marked
+
+def reconcile_storage(remove_orphans: bool) -> dict:
+    """Merge-join the files under UPLOAD_FOLDER with the blob and attachment tables
+    
+    Files no record refers to (orphans) are reported, or removed when remove_orphans is set; attachments
+    whose file is gone are marked with missing_at, and the mark is cleared again once the file is back.
+    Both sides are streamed in name order, so memory stays bounded however many files there are.
+    """
+    root = app.config['UPLOAD_FOLDER']
+    batch_size = app.config['RECONCILE_BATCH_SIZE']
+    cutoff = time.time() - app.config['RECONCILE_GRACE_MINUTES'] * 60
+    result = {'files_scanned': 0, 'orphan_files': 0, 'orphan_bytes': 0, 'orphans_removed': 0,
+              'records_marked_missing': 0, 'records_recovered': 0}
+    
+    def settled(stat):
+        # Files are written before their record commits and released blobs removed after it; ctime also
+        # covers renames (a blob stashed a moment ago keeps its old mtime)
+        return max(stat.st_mtime, stat.st_ctime) < cutoff
+    
+    def orphan(name, path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return
+        if not settled(stat) or storage_key_referenced(name):
+            return
+        result['orphan_files'] += 1
+        result['orphan_bytes'] += stat.st_size
+        if not remove_orphans:
+            logger.warning(f"Orphan file {path} ({stat.st_size} bytes)")
+            return
+        try:
+            os.remove(path)
+            result['orphans_removed'] += 1
+            logger.info(f"Removed orphan file {path}")
+        except FileNotFoundError:
+            pass
+    
+    # Leftovers of interrupted requests: partial uploads and blobs released by a transaction that never finished
+    incoming = os.path.join(root, INCOMING_DIR)
+    if os.path.isdir(incoming):
+        with os.scandir(incoming) as entries:
+            for entry in entries:
+                if entry.name.endswith('.partial'):
+                    orphan(entry.name, entry.path)
+                elif entry.name.endswith('.released'):
+                    key = entry.name.split('.', 1)[0]
+                    try:
+                        if not settled(entry.stat()):
+                            continue
+                    except FileNotFoundError:
+                        continue
+                    if db.session.get(AttachmentBlob, key) is not None and not storage.exists(key):
+                        storage.unstash(f"{INCOMING_DIR}/{entry.name}", key)
+                        logger.warning(f"Restored released blob {key} that is still referenced")
+                    else:
+                        orphan(entry.name, entry.path)
+    
+    missing = []
+    with db.engine.connect() as connection:
+        # SQLite cannot commit while the streaming read is open, so there the marks wait for the end of the walk
+        mark_during_walk = connection.dialect.name != 'sqlite'
+        keys = stored_keys(connection, batch_size)
+        key = next(keys, None)
+        key_found = False
+        for name, path in stored_files(root):
+            result['files_scanned'] += 1
+            preview = PREVIEW_FILE_PATTERN.match(name)
+            owner = preview.group(1) if preview else name  # Previews sort right after their blob
+            while key is not None and key < owner:
+                if not key_found:
+                    missing.append(key)
+                    if mark_during_walk and len(missing) >= batch_size:
+                        result['records_marked_missing'] += mark_missing_files(missing)
+                        missing = []
+                key = next(keys, None)
+                key_found = False
+            if key == owner:
+                key_found = key_found or not preview
+            else:
+                orphan(name, path)
+        
+        while key is not None:
+            if not key_found:
+                missing.append(key)
+            key = next(keys, None)
+            key_found = False
+    result['records_marked_missing'] += mark_missing_files(missing)
+    
+    # Clear marks whose file has come back (restored from backup, or a transient mount problem)
+    recovered = [
+        attachment_id for attachment_id, filename in
+        db.session.query(Attachment.id, Attachment.filename).filter(Attachment.missing_at.isnot(None))
+        if storage.exists(filename)
+    ]
+    for start in range(0, len(recovered), batch_size):
+        Attachment.query.filter(Attachment.id.in_(recovered[start:start + batch_size])).update(
+            {'missing_at': None}, synchronize_session=False
+        )
+    db.session.commit()
+    result['records_recovered'] = len(recovered)
+    return result
+
 def verify_user_token(token: str) -> dict:
     """Verify token with User Service"""
     try:
@@ -147,8 +1118,9 @@ def log_activity(user_id: int, action: str, entity_type: str, entity_id: int, de
             'entity_type': entity_type,
             'entity_id': entity_id,
             'details': details,
-            'ip_address': request.remote_addr,
-            'user_agent': request.headers.get('User-Agent', '')[:500]
+            # Uploads finalized by the Celery worker are logged outside a request
+            'ip_address': request.remote_addr if has_request_context() else None,
+            'user_agent': request.headers.get('User-Agent', '')[:500] if has_request_context() else ''
         }
         
         response = requests.post(
@@ -181,6 +1153,147 @@ def token_required(f):
         return f(*args, **kwargs)
     return decorated
 
+# Celery Tasks
+@celery.task(bind=True, max_retries=3, acks_late=True, reject_on_worker_lost=True)
+def generate_attachment_previews(self, file_hash: str):
+    """Render the thumbnail and preview JPEGs of a blob and store them next to it"""
+    blob = AttachmentBlob.query.get(file_hash)
+    if not blob or blob.preview_status == 'ready':
+        return {'file_hash': file_hash, 'status': blob.preview_status if blob else 'released'}
+    
+    try:
+        with blob_local_copy(file_hash) as path:
+            try:
+                source = load_preview_source(path)
+            except Exception as e:
+                logger.error(f"Failed to decode blob {file_hash} for previews: {e}")
+                source = None
+                blob.preview_status = 'failed'
+            
+            if source is not None:
+                for size, pixels in app.config['PREVIEW_SIZES'].items():
+                    image = source.copy()
+                    image.thumbnail((pixels, pixels))
+                    rendered = os.path.join(app.config['UPLOAD_FOLDER'], INCOMING_DIR, f"{uuid.uuid4()}.preview")
+                    try:
+                        image.save(rendered, 'JPEG', quality=85, optimize=True, progressive=True)
+                        storage.put_file(rendered, preview_key(file_hash, size))
+                    finally:
+                        if os.path.exists(rendered):
+                            os.remove(rendered)
+                blob.preview_status = 'ready'
+            elif blob.preview_status != 'failed':
+                blob.preview_status = 'unsupported'
+        
+        db.session.commit()
+        logger.info(f"Previews for blob {file_hash}: {blob.preview_status}")
+        return {'file_hash': file_hash, 'status': blob.preview_status}
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to generate previews for blob {file_hash}: {e}")
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=e, countdown=60 * (2 ** self.request.retries))
+        
+        # Out of retries: record the failure so the blob does not stay 'pending' forever
+        blob = AttachmentBlob.query.get(file_hash)
+        if blob and blob.preview_status != 'ready':
+            blob.preview_status = 'failed'
+            db.session.commit()
+        return {'file_hash': file_hash, 'status': 'failed'}
+
+@celery.task(bind=True, max_retries=3, acks_late=True, reject_on_worker_lost=True)
+def finalize_upload_session(self, upload_id: str):
+    """Hash a claimed resumable upload's staging file and store it as an attachment"""
+    upload = UploadSession.query.get(upload_id)
+    if not upload or upload.status != 'completing':
+        return {'upload_id': upload_id, 'status': upload.status if upload else 'missing'}
+    
+    try:
+        # Chunks were verified on arrival; one sequential pass gives the whole-file hash in constant memory
+        staging_path = upload_staging_path(upload)
+        file_hash = calculate_file_hash(staging_path)
+        
+        attachment = Attachment(
+            filename=file_hash,
+            original_filename=upload.original_filename,
+            file_size=upload.total_size,
+            mime_type=upload.mime_type,
+            file_hash=file_hash,
+            task_id=upload.task_id,
+            uploaded_by=upload.uploaded_by
+        )
+        db.session.add(attachment)
+        db.session.flush()
+        # Conditional so a redelivered task racing this one cannot create a second attachment
+        finished = UploadSession.query.filter_by(id=upload.id, status='completing').update(
+            {'status': 'completed', 'attachment_id': attachment.id, 'error_message': None}, synchronize_session=False
+        )
+        if finished != 1:
+            db.session.rollback()
+            return {'upload_id': upload_id, 'status': 'skipped'}
+        upload.chunks.delete(synchronize_session=False)
+        # The staging file stays until the commit succeeds so a failed attempt can be retried
+        store_attachment(attachment, incoming_path=staging_path, keep_on_failure=True)
+        
+        log_activity(upload.uploaded_by, 'upload', 'attachment', attachment.id, {
+            'filename': upload.original_filename,
+            'task_id': upload.task_id,
+            'file_size': upload.total_size
+        })
+        
+        logger.info(f"Resumable upload {upload_id} completed: {upload.original_filename} for task {upload.task_id}")
+        return {'upload_id': upload_id, 'status': 'completed', 'attachment_id': attachment.id}
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to complete upload {upload_id}: {e}")
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=e, countdown=30 * 2 ** self.request.retries)
+        
+        # Out of retries: reopen the session so the client can complete it again
+        release_upload(upload_id, 'Failed to complete upload')
+        return {'upload_id': upload_id, 'status': 'open'}
+
+@celery.task
+def reconcile_attachment_storage(remove_orphans: bool = None):
+    """Report (or remove) orphan files in the upload folder and mark attachments whose file is missing"""
+    try:
+        if storage.name != 'local':
+            logger.info(f"Storage reconciliation skipped for {storage.name} storage")
+            return {'status': 'skipped', 'storage_backend': storage.name}
+        with os.scandir(app.config['UPLOAD_FOLDER']) as entries:
+            flat_files = sum(1 for entry in entries if not entry.name.startswith('.') and entry.is_file())
+        if flat_files:
+            # Flat files are not in shard order; marking or removing anything from a partial walk would be wrong
+            logger.error(f"Storage reconciliation needs a sharded upload folder; run `flask shard-uploads` "
+                         f"({flat_files} flat files left)")
+            return {'status': 'error', 'message': 'Upload folder is not fully sharded'}
+        
+        if remove_orphans is None:
+            remove_orphans = app.config['RECONCILE_REMOVE_ORPHANS']
+        result = reconcile_storage(remove_orphans)
+        
+        logger.info(f"Reconciled attachment storage: {result}")
+        return {'status': 'success', **result}
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to reconcile attachment storage: {e}")
+        return {'status': 'error', 'message': str(e)}
+
+# Scheduled background tasks (configured at import time so `celery beat` picks them up;
+# old-style setting names because the Flask config passes CELERY_* keys)
+celery.conf.update(
+    CELERYBEAT_SCHEDULE={
+        'reconcile-attachment-storage': {
+            'task': 'attachment_service.reconcile_attachment_storage',
+            'schedule': crontab(hour=4, minute=0),  # Daily at 4 AM
+        },
+    },
+    CELERY_TIMEZONE='UTC'
+)
+
 # Attachment Routes
 @app.route('/api/tasks/<int:task_id>/attachments', methods=['POST'])
 @token_required
@@ -204,26 +1317,17 @@ def upload_attachment(task_id):
         if not allowed_file(file.filename):
             return jsonify({'error': f'File type not allowed. Allowed extensions: {", ".join(app.config["ALLOWED_EXTENSIONS"])}'}), 400
         
-        # Generate unique filename
         original_filename = secure_filename(file.filename)
-        file_extension = original_filename.rsplit('.', 1)[1].lower() if '.' in original_filename else ''
-        unique_filename = f"{uuid.uuid4()}.{file_extension}" if file_extension else str(uuid.uuid4())
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
         
-        # Save file
+        # The body was hashed and written to the upload folder while it was parsed
         try:
-            file.save(file_path)
+            incoming_path, file_hash, file_size = receive_upload(file)
         except Exception as e:
             logger.error(f"Failed to save file {original_filename}: {e}")
             return jsonify({'error': 'Failed to save file to server storage'}), 500
         
-        # Calculate file hash and size
-        file_hash = calculate_file_hash(file_path)
-        file_size = os.path.getsize(file_path)
-        
-        # Create attachment record
         attachment = Attachment(
-            filename=unique_filename,
+            filename=file_hash,
             original_filename=original_filename,
             file_size=file_size,
             mime_type=file.content_type,
@@ -231,9 +1335,7 @@ def upload_attachment(task_id):
             task_id=task_id,
             uploaded_by=user_id
         )
-        
-        db.session.add(attachment)
-        db.session.commit()
+        store_attachment(attachment, incoming_path)
         
         log_activity(user_id, 'upload', 'attachment', attachment.id, {
             'filename': original_filename,
@@ -257,6 +1359,343 @@ def upload_attachment(task_id):
         logger.error(f"Failed to upload attachment: {e}")
         return jsonify({'error': 'Failed to upload file'}), 500
 
+# Resumable upload routes
+@app.route('/api/attachments/uploads', methods=['POST'])
+@token_required
+def create_upload_session():
+    """Start a resumable upload; chunks are then PUT individually and the session completed"""
+    try:
+        user_id = request.current_user['id']
+        data = request.get_json()
+        
+        fields, error = parse_new_upload(data)
+        if error:
+            return error
+        task_id, original_filename, total_size = fields
+        
+        try:
+            chunk_size = int(data.get('chunk_size') or app.config['UPLOAD_CHUNK_SIZE'])
+        except (TypeError, ValueError):
+            return jsonify({'error': 'chunk_size must be an integer'}), 400
+        
+        if not app.config['MIN_UPLOAD_CHUNK_SIZE'] <= chunk_size <= app.config['MAX_CONTENT_LENGTH']:
+            return jsonify({'error': f"chunk_size must be between {app.config['MIN_UPLOAD_CHUNK_SIZE']} and {app.config['MAX_CONTENT_LENGTH']} bytes"}), 400
+        
+        task_access = verify_task_access(task_id, user_id)
+        if not task_access or not task_access.get('has_access'):
+            return jsonify({'error': 'Task not found or access denied'}), 404
+        
+        upload = UploadSession(
+            task_id=task_id,
+            uploaded_by=user_id,
+            original_filename=original_filename,
+            mime_type=data.get('mime_type'),
+            total_size=total_size,
+            chunk_size=chunk_size
+        )
+        db.session.add(upload)
+        db.session.flush()
+        
+        # Sparse staging file of the final size; chunks are written at their offsets in any order
+        with open(upload_staging_path(upload), 'wb') as staging:
+            staging.truncate(total_size)
+        db.session.commit()
+        
+        logger.info(f"Upload session {upload.id} started for {upload.original_filename} ({total_size} bytes) on task {task_id}")
+        return jsonify({
+            'message': 'Upload session created',
+            'upload': upload_progress(upload)
+        }), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to create upload session: {e}")
+        return jsonify({'error': 'Failed to create upload session'}), 500
+
+@app.route('/api/attachments/uploads/<upload_id>', methods=['GET'])
+@token_required
+def get_upload_session(upload_id):
+    """Get an upload session with the byte ranges received so far (to resume after a dropped connection)"""
+    try:
+        upload, error = load_own_upload(upload_id)
+        if error:
+            return error
+        return jsonify({'upload': upload_progress(upload)})
+        
+    except Exception as e:
+        logger.error(f"Failed to get upload session {upload_id}: {e}")
+        return jsonify({'error': 'Failed to retrieve upload session'}), 500
+
+@app.route('/api/attachments/uploads/<upload_id>/chunks/<int:chunk_index>', methods=['PUT'])
+@token_required
+def put_upload_chunk(upload_id, chunk_index):
+    """Write one chunk (raw request body) at its offset; X-Chunk-SHA256 must match the body"""
+    try:
+        upload, error = load_own_upload(upload_id)
+        if error:
+            return error
+        
+        if upload.status != 'open' or upload.direct:
+            return jsonify({'error': f'Upload session is {upload.status}' if upload.status != 'open' else 'Direct uploads go to their presigned URL'}), 409
+        
+        if not 0 <= chunk_index < upload.chunk_count:
+            return jsonify({'error': f'chunk_index must be between 0 and {upload.chunk_count - 1}'}), 400
+        
+        expected_length = upload.chunk_length(chunk_index)
+        if request.content_length != expected_length:
+            return jsonify({'error': f'Chunk {chunk_index} must be exactly {expected_length} bytes'}), 400
+        
+        expected_hash = (request.headers.get('X-Chunk-SHA256') or '').lower()
+        if not expected_hash:
+            return jsonify({'error': 'X-Chunk-SHA256 header is required'}), 400
+        
+        existing = UploadChunk.query.get((upload.id, chunk_index))
+        if not existing or existing.sha256 != expected_hash:
+            # Stream the body straight to its offset in the staging file, hashing as it goes
+            sha256 = hashlib.sha256()
+            received = 0
+            with open(upload_staging_path(upload), 'r+b') as staging:
+                staging.seek(chunk_index * upload.chunk_size)
+                try:
+                    for block in iter(lambda: request.stream.read(app.config['UPLOAD_BUFFER_SIZE']), b''):
+                        sha256.update(block)
+                        received += len(block)
+                        staging.write(block)
+                except ClientDisconnected:
+                    logger.warning(f"Client disconnected during chunk {chunk_index} of upload {upload.id}")
+                staging.flush()
+                os.fsync(staging.fileno())
+            
+            if received != expected_length or sha256.hexdigest() != expected_hash:
+                # The previous copy of a resent chunk has been partly overwritten; it must be sent again
+                if existing:
+                    db.session.delete(existing)
+                    db.session.commit()
+                if received != expected_length:
+                    return jsonify({'error': f'Chunk {chunk_index} was truncated ({received} of {expected_length} bytes)'}), 400
+                return jsonify({'error': f'Checksum mismatch for chunk {chunk_index}'}), 400
+            
+            if existing:
+                existing.sha256 = expected_hash
+                existing.received_at = datetime.utcnow()
+            else:
+                db.session.add(UploadChunk(session_id=upload.id, chunk_index=chunk_index, sha256=expected_hash))
+            upload.updated_at = datetime.utcnow()
+            db.session.commit()
+        
+        return jsonify({
+            'chunk_index': chunk_index,
+            'received_chunks': upload.chunks.count(),
+            'chunk_count': upload.chunk_count
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to store chunk {chunk_index} of upload {upload_id}: {e}")
+        return jsonify({'error': 'Failed to store chunk'}), 500
+
+@app.route('/api/attachments/uploads/<upload_id>/complete', methods=['POST'])
+@token_required
+def complete_upload_session(upload_id):
+    """Queue a fully received upload to be turned into an attachment; poll the session for the result"""
+    try:
+        user_id = request.current_user['id']
+        upload, error = load_own_upload(upload_id)
+        if error:
+            return error
+        
+        if upload.status != 'open':
+            return jsonify({'error': f'Upload session is {upload.status}'}), 409
+        
+        if upload.direct:
+            return jsonify({'error': 'Complete direct uploads via /api/attachments/direct-uploads/{id}/complete'}), 409
+        
+        received = {index for (index,) in db.session.query(UploadChunk.chunk_index).filter_by(session_id=upload.id)}
+        missing = [index for index in range(upload.chunk_count) if index not in received]
+        if missing:
+            return jsonify({'error': 'Upload is incomplete', 'missing_chunks': missing}), 409
+        
+        task_access = verify_task_access(upload.task_id, user_id)
+        if not task_access or not task_access.get('has_access'):
+            return jsonify({'error': 'Task not found or access denied'}), 404
+        
+        # Only one completion request may claim the session
+        if not claim_upload(upload):
+            return jsonify({'error': 'Upload session is already being completed'}), 409
+        
+        # Hashing and storing gigabytes outlasts a request; the worker does it and updates the session
+        try:
+            finalize_upload_session.delay(upload.id)
+        except Exception as e:
+            logger.error(f"Failed to queue completion of upload {upload.id}: {e}")
+            release_upload(upload.id, 'Failed to queue completion')
+            return jsonify({'error': 'Failed to queue upload completion'}), 503
+        
+        db.session.refresh(upload)
+        logger.info(f"Resumable upload {upload.id} queued for completion")
+        return jsonify({
+            'message': 'Upload is being completed; poll the upload session for its attachment_id',
+            'upload': upload_progress(upload)
+        }), 202
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to complete upload {upload_id}: {e}")
+        return jsonify({'error': 'Failed to complete upload'}), 500
+
+@app.route('/api/attachments/direct-uploads', methods=['POST'])
+@token_required
+def create_direct_upload():
+    """Start an upload the client sends straight to object storage with a presigned PUT"""
+    try:
+        user_id = request.current_user['id']
+        
+        if not storage.supports_presigned:
+            return jsonify({'error': 'Direct uploads require STORAGE_BACKEND=s3'}), 400
+        
+        data = request.get_json()
+        fields, error = parse_new_upload(data)
+        if error:
+            return error
+        task_id, original_filename, total_size = fields
+        
+        expected_hash = str(data.get('sha256') or '').lower()
+        if not re.fullmatch(r'[0-9a-f]{64}', expected_hash):
+            return jsonify({'error': 'sha256 must be the hex SHA-256 of the file'}), 400
+        
+        task_access = verify_task_access(task_id, user_id)
+        if not task_access or not task_access.get('has_access'):
+            return jsonify({'error': 'Task not found or access denied'}), 404
+        
+        # The bytes are always uploaded, even if the hash is already stored: a known hash alone must not
+        # grant access to content; duplicates are dropped server-side when the upload is completed
+        upload = UploadSession(
+            task_id=task_id,
+            uploaded_by=user_id,
+            original_filename=original_filename,
+            mime_type=data.get('mime_type'),
+            total_size=total_size,
+            chunk_size=total_size,
+            direct=True,
+            expected_hash=expected_hash
+        )
+        db.session.add(upload)
+        db.session.commit()
+        
+        expires_in = app.config['PRESIGNED_URL_EXPIRY']
+        upload_url, upload_headers = storage.presigned_upload(
+            upload_staging_key(upload), expected_hash, total_size, expires_in
+        )
+        
+        logger.info(f"Direct upload {upload.id} started for {original_filename} ({total_size} bytes) on task {task_id}")
+        return jsonify({
+            'message': 'Direct upload created',
+            'upload': upload.to_dict(),
+            'upload_url': upload_url,
+            'upload_method': 'PUT',
+            'upload_headers': upload_headers,
+            'expires_in': expires_in
+        }), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to create direct upload: {e}")
+        return jsonify({'error': 'Failed to create direct upload'}), 500
+
+@app.route('/api/attachments/direct-uploads/<upload_id>/complete', methods=['POST'])
+@token_required
+def complete_direct_upload(upload_id):
+    """Confirm the size and hash of a direct upload and turn it into an attachment"""
+    try:
+        user_id = request.current_user['id']
+        upload, error = load_own_upload(upload_id)
+        if error:
+            return error
+        
+        if upload.status != 'open':
+            return jsonify({'error': f'Upload session is {upload.status}'}), 409
+        
+        if not upload.direct:
+            return jsonify({'error': 'Not a direct upload'}), 409
+        
+        staged_key = upload_staging_key(upload)
+        staged = storage.stat(staged_key)
+        if not staged:
+            return jsonify({'error': 'File has not been uploaded to the presigned URL yet'}), 409
+        
+        size, checksum = staged
+        if size != upload.total_size or staged_object_sha256(staged_key, size, checksum) != upload.expected_hash:
+            storage.delete(staged_key)
+            return jsonify({'error': 'Uploaded file does not match the declared size and sha256; upload it again'}), 400
+        
+        task_access = verify_task_access(upload.task_id, user_id)
+        if not task_access or not task_access.get('has_access'):
+            return jsonify({'error': 'Task not found or access denied'}), 404
+        
+        if not claim_upload(upload):
+            return jsonify({'error': 'Upload session is already being completed'}), 409
+        
+        attachment = Attachment(
+            filename=upload.expected_hash,
+            original_filename=upload.original_filename,
+            file_size=upload.total_size,
+            mime_type=upload.mime_type,
+            file_hash=upload.expected_hash,
+            task_id=upload.task_id,
+            uploaded_by=user_id
+        )
+        try:
+            db.session.add(attachment)
+            db.session.flush()
+            upload.status = 'completed'
+            upload.attachment_id = attachment.id
+            store_attachment(attachment, staged_key=staged_key, keep_on_failure=True)
+        except Exception:
+            db.session.rollback()
+            release_upload(upload.id, 'Failed to complete upload')
+            raise
+        
+        log_activity(user_id, 'upload', 'attachment', attachment.id, {
+            'filename': upload.original_filename,
+            'task_id': upload.task_id,
+            'file_size': upload.total_size
+        })
+        
+        attachment_dict = attachment.to_dict()
+        uploader_info = get_user_info(user_id, request.token)
+        attachment_dict['uploaded_by_username'] = uploader_info.get('username') if uploader_info else 'Unknown'
+        
+        logger.info(f"Direct upload {upload.id} completed: {upload.original_filename} for task {upload.task_id}")
+        return jsonify({
+            'message': 'File uploaded successfully',
+            'attachment': attachment_dict
+        }), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to complete direct upload {upload_id}: {e}")
+        return jsonify({'error': 'Failed to complete upload'}), 500
+
+@app.route('/api/attachments/uploads/<upload_id>', methods=['DELETE'])
+@token_required
+def abort_upload_session(upload_id):
+    """Abort an upload session and discard what was received"""
+    try:
+        upload, error = load_own_upload(upload_id)
+        if error:
+            return error
+        
+        if upload.status != 'open':
+            return jsonify({'error': f'Upload session is {upload.status}'}), 409
+        
+        discard_upload(upload)
+        return jsonify({'message': 'Upload session aborted'})
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to abort upload {upload_id}: {e}")
+        return jsonify({'error': 'Failed to abort upload'}), 500
+
 @app.route('/api/tasks/<int:task_id>/attachments', methods=['GET'])
 @token_required
 def get_task_attachments(task_id):
@@ -271,10 +1710,17 @@ def get_task_attachments(task_id):
         
         attachments = Attachment.query.filter_by(task_id=task_id).order_by(Attachment.created_at.desc()).all()
         
-        # Enrich attachments with uploader information
+        preview_statuses = dict(db.session.query(AttachmentBlob.file_hash, AttachmentBlob.preview_status).filter(
+            AttachmentBlob.file_hash.in_({a.file_hash for a in attachments if a.content_addressed})
+        )) if attachments else {}
+        
+        # Enrich attachments with uploader and preview information
         enriched_attachments = []
         for attachment in attachments:
             attachment_dict = attachment.to_dict()
+            attachment_dict['preview_status'] = preview_statuses.get(attachment.file_hash, 'unsupported')
+            if attachment_dict['preview_status'] == 'ready':
+                attachment_dict['thumbnail_url'] = f"/api/attachments/{attachment.id}/preview?size=thumbnail"
             uploader_info = get_user_info(attachment.uploaded_by, request.token)
             attachment_dict['uploaded_by_username'] = uploader_info.get('username') if uploader_info else 'Unknown'
             enriched_attachments.append(attachment_dict)
@@ -285,6 +1731,58 @@ def get_task_attachments(task_id):
         logger.error(f"Failed to get attachments for task {task_id}: {e}")
         return jsonify({'error': 'Failed to retrieve attachments'}), 500
 
+@app.route('/api/tasks/<int:task_id>/attachments/archive', methods=['GET'])
+@token_required
+def download_task_archive(task_id):
+    """Download every attachment of a task as one ZIP, streamed while it is built"""
+    try:
+        user_id = request.current_user['id']
+        
+        # One access check and one audit event cover the whole bundle
+        task_access = verify_task_access(task_id, user_id)
+        if not task_access or not task_access.get('has_access'):
+            return jsonify({'error': 'Task not found or access denied'}), 404
+        
+        attachments = Attachment.query.filter_by(task_id=task_id).order_by(Attachment.created_at).all()
+        if not attachments:
+            return jsonify({'error': 'Task has no attachments'}), 404
+        
+        available = []
+        for attachment in attachments:
+            if attachment_available(attachment):
+                available.append(attachment)
+            else:
+                logger.error(f"File missing for attachment {attachment.id}; left out of task {task_id} archive")
+        if not available:
+            return jsonify({'error': 'File not found on server'}), 404
+        
+        log_activity(user_id, 'download_archive', 'task', task_id, {
+            'attachment_ids': [attachment.id for attachment in available],
+            'file_count': len(available),
+            'total_size': sum(attachment.file_size or 0 for attachment in available)
+        })
+        
+        members = list(zip(archive_member_names(available), available))
+        db.session.close()  # The body is produced after the request returns; nothing below needs the database
+        
+        def generate():
+            try:
+                yield from stream_zip(members)
+            except Exception as e:
+                # Headers are already sent; the client sees a truncated archive
+                logger.error(f"Task {task_id} archive stream aborted: {e}")
+                raise
+        
+        response = Response(generate(), mimetype='application/zip', direct_passthrough=True)
+        response.headers['Content-Disposition'] = f"attachment; filename=task-{task_id}-attachments.zip"
+        response.headers['X-Accel-Buffering'] = 'no'  # Let nginx pass chunks through instead of spooling the archive
+        response.headers['Cache-Control'] = 'private, no-store'
+        return response
+        
+    except Exception as e:
+        logger.error(f"Failed to build attachment archive for task {task_id}: {e}")
+        return jsonify({'error': 'Failed to download attachments'}), 500
+
 @app.route('/api/attachments/<int:attachment_id>', methods=['GET'])
 @token_required
 def get_attachment(attachment_id):
@@ -328,7 +1826,14 @@ def download_attachment(attachment_id):
         if not task_access or not task_access.get('has_access'):
             return jsonify({'error': 'Access denied'}), 403
         
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], attachment.filename)
+        file_path = attachment_file_path(attachment)
+        
+        if file_path is None:
+            # Remote storage: the client fetches the bytes straight from the bucket
+            log_activity(user_id, 'download', 'attachment', attachment.id, {
+                'filename': attachment.original_filename
+            })
+            return redirect(presigned_download_url(attachment))
         
         if not os.path.exists(file_path):
             logger.error(f"File not found on disk for attachment {attachment_id}: {file_path}")
@@ -338,6 +1843,13 @@ def download_attachment(attachment_id):
             'filename': attachment.original_filename
         })
         
+        if app.config['DOWNLOAD_MODE'] == 'x-accel':
+            return accel_redirect_response(
+                file_path,
+                attachment.original_filename,
+                attachment.mime_type or 'application/octet-stream'
+            )
+        
         return send_file(
             file_path,
             as_attachment=True,
@@ -349,6 +1861,91 @@ def download_attachment(attachment_id):
         logger.error(f"Failed to download attachment {attachment_id}: {e}")
         return jsonify({'error': 'Failed to download file'}), 500
 
+@app.route('/api/attachments/<int:attachment_id>/download-url')
+@token_required
+def get_attachment_download_url(attachment_id):
+    """Get a time-limited URL to download an attachment straight from object storage"""
+    try:
+        user_id = request.current_user['id']
+        attachment = Attachment.query.get(attachment_id)
+        
+        if not attachment:
+            return jsonify({'error': 'Attachment not found'}), 404
+        
+        task_access = verify_task_access(attachment.task_id, user_id)
+        if not task_access or not task_access.get('has_access'):
+            return jsonify({'error': 'Access denied'}), 403
+        
+        if attachment_file_path(attachment) is not None:
+            return jsonify({'error': 'Attachment is stored locally; use /api/attachments/{id}/download'}), 409
+        
+        log_activity(user_id, 'download', 'attachment', attachment.id, {
+            'filename': attachment.original_filename
+        })
+        
+        return jsonify({
+            'url': presigned_download_url(attachment),
+            'expires_in': app.config['PRESIGNED_URL_EXPIRY']
+        })
+        
+    except Exception as e:
+        logger.error(f"Failed to create download URL for attachment {attachment_id}: {e}")
+        return jsonify({'error': 'Failed to create download URL'}), 500
+
+@app.route('/api/attachments/<int:attachment_id>/preview')
+@token_required
+def get_attachment_preview(attachment_id):
+    """Get the thumbnail or first-page preview of an image/PDF attachment (cacheable for a year)"""
+    try:
+        size = request.args.get('size', 'thumbnail')
+        if size not in app.config['PREVIEW_SIZES']:
+            return jsonify({'error': f"size must be one of: {', '.join(app.config['PREVIEW_SIZES'])}"}), 400
+        
+        user_id = request.current_user['id']
+        attachment = Attachment.query.get(attachment_id)
+        
+        if not attachment:
+            return jsonify({'error': 'Attachment not found'}), 404
+        
+        task_access = verify_task_access(attachment.task_id, user_id)
+        if not task_access or not task_access.get('has_access'):
+            return jsonify({'error': 'Access denied'}), 403
+        
+        blob = AttachmentBlob.query.get(attachment.file_hash) if attachment.content_addressed else None
+        if not blob or blob.preview_status in ('failed', 'unsupported'):
+            return jsonify({'error': 'No preview available for this attachment'}), 404
+        if blob.preview_status == 'pending':
+            return jsonify({'status': 'pending', 'message': 'Preview is being generated'}), 202
+        
+        # A blob's previews never change, so the browser may keep them; revalidation is a cheap 304
+        etag = f"{blob.file_hash}-{size}"
+        cache_control = f"private, max-age={app.config['PREVIEW_CACHE_MAX_AGE']}, immutable"
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            key = preview_key(blob.file_hash, size)
+            path = storage.path(key)
+            if path and os.path.exists(path):
+                response = send_file(path, mimetype='image/jpeg', etag=False)
+            elif not path and storage.exists(key):
+                response = Response(storage.open(key).read(), mimetype='image/jpeg')
+            else:
+                # Preview lost (e.g. released and re-uploaded meanwhile): render it again
+                logger.warning(f"Preview {key} missing for attachment {attachment_id}; regenerating")
+                blob.preview_status = 'pending'
+                db.session.commit()
+                queue_previews(blob.file_hash)
+                return jsonify({'status': 'pending', 'message': 'Preview is being generated'}), 202
+        
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = cache_control
+        return response
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to get preview for attachment {attachment_id}: {e}")
+        return jsonify({'error': 'Failed to retrieve preview'}), 500
+
 @app.route('/api/attachments/<int:attachment_id>', methods=['DELETE'])
 @token_required
 def delete_attachment(attachment_id):
@@ -365,15 +1962,27 @@ def delete_attachment(attachment_id):
         if not task_access or not task_access.get('has_access'):
             return jsonify({'error': 'Access denied'}), 403
         
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], attachment.filename)
+        file_path = attachment_file_path(attachment)
         original_filename = attachment.original_filename
         task_id = attachment.task_id
+        content_addressed = attachment.content_addressed
         
         db.session.delete(attachment)
-        db.session.commit()
+        adjust_type_stats(removed_type_stats([attachment]))
+        released = []
+        try:
+            if content_addressed:
+                released = release_blob_references({attachment.file_hash: 1})
+            db.session.commit()
+        except Exception:
+            restore_released_blobs(released)
+            raise
         
-        # Delete file from disk after database record is removed
-        if os.path.exists(file_path):
+        # Delete file after database record is removed (shared blobs only with their last reference)
+        if content_addressed:
+            if discard_released_blobs(released):
+                logger.info(f"Blob deleted from {storage.name} storage: {attachment.file_hash}")
+        elif os.path.exists(file_path):
             try:
                 os.remove(file_path)
                 logger.info(f"File deleted from disk: {file_path}")
@@ -406,35 +2015,50 @@ def get_attachment_count(task_id):
         logger.error(f"Failed to get attachment count for task {task_id}: {e}")
         return jsonify({'error': 'Failed to get attachment count'}), 500
 
+@app.route('/api/attachments/counts', methods=['POST'])
+def get_attachment_counts():
+    """Get attachment counts for many tasks at once (for other services)"""
+    try:
+        data = request.get_json()
+        task_ids, error = parse_task_ids(data)
+        if error:
+            return error
+        
+        counts = {task_id: 0 for task_id in task_ids}
+        chunk_size = app.config['BATCH_QUERY_CHUNK_SIZE']
+        for start in range(0, len(task_ids), chunk_size):
+            chunk = task_ids[start:start + chunk_size]
+            for task_id, count in db.session.query(Attachment.task_id, db.func.count()).filter(
+                Attachment.task_id.in_(chunk)
+            ).group_by(Attachment.task_id):
+                counts[task_id] = count
+        
+        return jsonify({'counts': counts})
+        
+    except Exception as e:
+        logger.error(f"Failed to get attachment counts: {e}")
+        return jsonify({'error': 'Failed to get attachment counts'}), 500
+
 @app.route('/api/attachments/bulk-delete', methods=['POST'])
 def bulk_delete_attachments():
     """Bulk delete attachments for tasks (for other services when tasks are deleted)"""
     try:
         data = request.get_json()
-        task_ids = data.get('task_ids', [])
-        
-        if not task_ids:
-            return jsonify({'error': 'No task IDs provided'}), 400
+        task_ids, error = parse_task_ids(data)
+        if error:
+            return error
         
-        # Get attachments to delete
-        attachments = Attachment.query.filter(Attachment.task_id.in_(task_ids)).all()
-        
-        # Delete files from disk
+        # One transaction per chunk keeps IN lists and row locks small; a retried request skips finished chunks
+        deleted_count = 0
         deleted_files = 0
-        for attachment in attachments:
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], attachment.filename)
-            if os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                    deleted_files += 1
-                except Exception as e:
-                    logger.error(f"Failed to delete file {file_path}: {e}")
+        task_chunk = app.config['BULK_DELETE_TASK_CHUNK']
+        for start in range(0, len(task_ids), task_chunk):
+            chunk = task_ids[start:start + task_chunk]
+            chunk_deleted, chunk_files = delete_task_attachments(chunk)
+            deleted_count += chunk_deleted
+            deleted_files += chunk_files
         
-        # Delete database records
-        deleted_count = Attachment.query.filter(Attachment.task_id.in_(task_ids)).delete(synchronize_session=False)
-        db.session.commit()
-        
-        logger.info(f"Bulk deleted {deleted_count} attachments ({deleted_files} files) for tasks: {task_ids}")
+        logger.info(f"Bulk deleted {deleted_count} attachments ({deleted_files} files) for {len(task_ids)} tasks")
         return jsonify({
             'message': f'Successfully deleted {deleted_count} attachments',
             'deleted_count': deleted_count,
@@ -450,25 +2074,18 @@ def bulk_delete_attachments():
 def get_attachment_stats():
     """Get attachment statistics (for reporting service)"""
     try:
-        total_attachments = Attachment.query.count()
-        total_size = db.session.query(db.func.sum(Attachment.file_size)).scalar() or 0
-        
-        # Get stats by file type
-        type_stats = db.session.query(
-            db.func.substr(Attachment.original_filename, db.func.instr(Attachment.original_filename, '.') + 1),
-            db.func.count(),
-            db.func.sum(Attachment.file_size)
-        ).group_by(
-            db.func.substr(Attachment.original_filename, db.func.instr(Attachment.original_filename, '.') + 1)
-        ).all()
-        
+        # One row per extension, maintained on upload/delete (see rebuild-attachment-stats)
+        total_attachments = 0
+        total_size = 0
         file_types = []
-        for ext, count, size in type_stats:
-            if ext and '.' not in ext:  # Simple validation
+        for stat in AttachmentTypeStat.query.order_by(AttachmentTypeStat.extension).all():
+            total_attachments += stat.attachment_count
+            total_size += stat.total_size
+            if stat.extension and stat.attachment_count:
                 file_types.append({
-                    'extension': ext.lower(),
-                    'count': count,
-                    'total_size': size or 0
+                    'extension': stat.extension,
+                    'count': stat.attachment_count,
+                    'total_size': stat.total_size
                 })
         
         return jsonify({
@@ -496,6 +2113,7 @@ def health_check():
             'service': 'attachment-service',
             'timestamp': datetime.utcnow().isoformat(),
             'upload_directory': app.config['UPLOAD_FOLDER'],
+            'storage_backend': storage.name,
             'upload_dir_writable': upload_dir_writable
         })
     except Exception as e:
@@ -531,6 +2149,142 @@ def internal_error(error):
     db.session.rollback()
     return jsonify({'error': 'Internal Server Error'}), 500
 
+@app.cli.command('dedupe-attachments')
+def dedupe_attachments():
+    """Move attachments uploaded before content addressing onto shared blobs, freeing duplicate files"""
+    converted = 0
+    last_id = 0
+    while True:
+        batch = Attachment.query.filter(
+            Attachment.id > last_id,
+            Attachment.file_hash.isnot(None),
+            Attachment.filename != Attachment.file_hash
+        ).order_by(Attachment.id).limit(app.config['DEDUPE_BATCH_SIZE']).all()
+        if not batch:
+            break
+        last_id = batch[-1].id
+        
+        legacy_paths = []
+        for attachment in batch:
+            legacy_path = attachment_file_path(attachment)
+            if not os.path.exists(legacy_path):
+                logger.warning(f"File not found on disk for attachment {attachment.id}: {legacy_path}")
+                continue
+            add_blob_reference(
+                attachment.file_hash,
+                attachment.file_size or os.path.getsize(legacy_path),
+                attachment.original_filename
+            )
+            # Keep the legacy file valid until the batch commits
+            if not storage.exists(attachment.file_hash):
+                storage.put_file(legacy_path, attachment.file_hash, keep_source=True)
+            attachment.filename = attachment.file_hash
+            legacy_paths.append(legacy_path)
+        db.session.commit()
+        
+        for legacy_path in legacy_paths:
+            os.remove(legacy_path)
+        converted += len(legacy_paths)
+    
+    logger.info(f"Converted {converted} legacy attachments to content-addressed blobs "
+                f"({AttachmentBlob.query.count()} blobs stored)")
+
+@app.cli.command('rebuild-attachment-stats')
+def rebuild_attachment_stats():
+    """Fill in missing attachment extensions and recompute attachment_type_stats from the attachments table"""
+    filled = 0
+    last_id = 0
+    while True:
+        batch = Attachment.query.filter(
+            Attachment.id > last_id,
+            Attachment.extension.is_(None)
+        ).order_by(Attachment.id).limit(app.config['DEDUPE_BATCH_SIZE']).all()
+        if not batch:
+            break
+        last_id = batch[-1].id
+        for attachment in batch:
+            attachment.extension = file_extension(attachment.original_filename)
+        db.session.commit()
+        filled += len(batch)
+    
+    if db.engine.dialect.name == 'postgresql':
+        # Hold back concurrent adjustments until the recount commits so none is lost or counted twice
+        db.session.execute(db.text('LOCK TABLE attachment_type_stats IN SHARE ROW EXCLUSIVE MODE'))
+    totals = db.session.query(
+        Attachment.extension,
+        db.func.count(),
+        db.func.coalesce(db.func.sum(Attachment.file_size), 0)
+    ).group_by(Attachment.extension).all()
+    stats = {}
+    for extension, count, size in totals:
+        stat = stats.setdefault(extension or '', AttachmentTypeStat(extension=extension or '', attachment_count=0, total_size=0))
+        stat.attachment_count += count
+        stat.total_size += size
+    AttachmentTypeStat.query.delete(synchronize_session=False)
+    db.session.add_all(stats.values())
+    db.session.commit()
+    logger.info(f"Attachment stats rebuilt: {len(stats)} extensions ({filled} attachment extensions filled in)")
+
+@app.cli.command('shard-uploads')
+@click.option('--batch-size', default=1000, show_default=True, help='Files moved between pauses')
+@click.option('--pause', default=0.1, show_default=True, help='Seconds to sleep between batches')
+def shard_uploads(batch_size, pause):
+    """Move files from the flat UPLOAD_FOLDER into hash-prefix shard directories while the service runs
+    
+    Each file is hard-linked into its shard before the flat name is removed, so readers (which fall back to
+    the flat location) find it at every moment. Safe to interrupt and re-run.
+    """
+    root = app.config['UPLOAD_FOLDER']
+    moved = 0
+    # One lazy pass over the directory; new uploads already go to shards, so nothing new appears behind it
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.name.startswith('.') or not entry.is_file(follow_symlinks=False):
+                continue
+            target = sharded_path(root, entry.name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            try:
+                os.link(entry.path, target)
+            except FileExistsError:
+                pass  # Same name means same content (hash-named) or an earlier interrupted run
+            except FileNotFoundError:
+                continue  # Deleted meanwhile
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+            
+            moved += 1
+            if moved % batch_size == 0:
+                logger.info(f"Sharded {moved} files")
+                time.sleep(pause)
+    
+    logger.info(f"Upload folder sharding complete ({moved} files moved); UPLOAD_FLAT_FALLBACK can now be disabled")
+
+@app.cli.command('reconcile-attachments')
+@click.option('--remove-orphans', is_flag=True, help='Delete orphan files instead of only reporting them')
+def reconcile_attachments(remove_orphans):
+    """Run the storage reconciliation now (normally scheduled nightly through celery beat)"""
+    result = reconcile_attachment_storage.run(remove_orphans or None)
+    click.echo(result)
+
+@app.cli.command('queue-previews')
+def queue_pending_previews():
+    """Queue preview generation for blobs still pending (new uploads during a broker outage, deduped legacy files)"""
+    pending = [file_hash for (file_hash,) in db.session.query(AttachmentBlob.file_hash).filter_by(preview_status='pending')]
+    for file_hash in pending:
+        queue_previews(file_hash)
+    logger.info(f"Queued preview generation for {len(pending)} blobs")
+
+@app.cli.command('expire-upload-sessions')
+def expire_upload_sessions():
+    """Abort resumable uploads idle for longer than UPLOAD_SESSION_TTL_HOURS and free their staging files"""
+    cutoff = datetime.utcnow() - timedelta(hours=app.config['UPLOAD_SESSION_TTL_HOURS'])
+    stale = UploadSession.query.filter(UploadSession.status == 'open', UploadSession.updated_at < cutoff).all()
+    for upload in stale:
+        discard_upload(upload)
+    logger.info(f"Expired {len(stale)} idle upload sessions")
+
 # Database initialization
 def init_db():
     """Initialize database"""
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the attachment upload path
+Parses synthetic multipart bodies and compares the default Werkzeug handling
+(spool to a temp file, save a copy, re-read it to hash) with the single-pass
+stream used by the service (hash while writing into the upload folder, then rename)
+"""
+
+import argparse
+import hashlib
+import io
+import os
+import tempfile
+import time
+import uuid
+
+from werkzeug.formparser import parse_form_data
+
+BOUNDARY = 'benchboundary'
+
+def multipart_body(payload):
+    """Build a multipart/form-data body holding one file field"""
+    head = (
+        f'--{BOUNDARY}\r\n'
+        'Content-Disposition: form-data; name="file"; filename="bench.bin"\r\n'
+        'Content-Type: application/octet-stream\r\n\r\n'
+    ).encode()
+    return head + payload + f'\r\n--{BOUNDARY}--\r\n'.encode()
+
+def environ_for(body):
+    return {
+        'REQUEST_METHOD': 'POST',
+        'CONTENT_TYPE': f'multipart/form-data; boundary={BOUNDARY}',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': io.BytesIO(body),
+    }
+
+def spool_save_rehash(body, folder, buffer_size):
+    """Old path: default stream factory, FileStorage.save, then hash the saved file"""
+    _, _, files = parse_form_data(environ_for(body))
+    path = os.path.join(folder, f'{uuid.uuid4()}.bin')
+    files['file'].save(path)
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(4096), b''):
+            sha256.update(block)
+    return sha256.hexdigest(), os.path.getsize(path)
+
+class HashingFileWriter:
+    """Mirrors app.HashingFileWriter"""
+
+    def __init__(self, path, buffer_size):
+        self.path = path
+        self.file = open(path, 'w+b', buffering=buffer_size)
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.file.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+def single_pass(body, folder, buffer_size):
+    """New path: hash while the parser writes into the upload folder, then rename into place"""
+    incoming = os.path.join(folder, '.incoming')
+    os.makedirs(incoming, exist_ok=True)
+
+    def stream_factory(total_content_length, content_type, filename, content_length=None):
+        return HashingFileWriter(os.path.join(incoming, f'{uuid.uuid4()}.partial'), buffer_size)
+
+    _, _, files = parse_form_data(environ_for(body), stream_factory=stream_factory)
+    writer = files['file'].stream
+    writer.file.flush()
+    os.fsync(writer.file.fileno())
+    writer.file.close()
+    os.replace(writer.path, os.path.join(folder, f'{uuid.uuid4()}.bin'))
+    return writer.sha256.hexdigest(), writer.size
+
+def measure(func, body, folder, buffer_size, repeat):
+    """Return median seconds per upload"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(body, folder, buffer_size)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size-mb', type=int, default=16)
+    parser.add_argument('--buffer-kb', type=int, default=1024)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    payload = os.urandom(args.size_mb * 1024 * 1024)
+    body = multipart_body(payload)
+    expected = (hashlib.sha256(payload).hexdigest(), len(payload))
+    buffer_size = args.buffer_kb * 1024
+
+    with tempfile.TemporaryDirectory() as folder:
+        for func in (spool_save_rehash, single_pass):
+            assert func(body, folder, buffer_size) == expected, func.__name__
+            seconds = measure(func, body, folder, buffer_size, args.repeat)
+            print(f"{func.__name__:18} {seconds * 1000:9.1f} ms  {args.size_mb / seconds:8.1f} MB/s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the upload folder layout
+Creates N empty blob files named like the service names them (SHA-256 hex) either
+directly in one directory or under two levels of hash-prefix shards, then compares
+existence checks, stats and a full directory walk between the two layouts
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import tempfile
+import time
+
+def sharded_path(root, name):
+    """Mirrors app.sharded_path"""
+    return os.path.join(root, name[:2], name[2:4], name)
+
+def flat_path(root, name):
+    return os.path.join(root, name)
+
+def populate(root, names, layout):
+    for name in names:
+        path = layout(root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, 'wb').close()
+
+def walk(root):
+    """Count files with os.scandir, recursing into shard directories"""
+    count = 0
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                else:
+                    count += 1
+    return count
+
+def measure(func, paths):
+    """Return median microseconds per call"""
+    timings = []
+    for path in paths:
+        start = time.perf_counter()
+        func(path)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2] * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--files', type=int, default=200000)
+    parser.add_argument('--samples', type=int, default=5000)
+    args = parser.parse_args()
+
+    names = [hashlib.sha256(str(i).encode()).hexdigest() for i in range(args.files)]
+    hits = random.sample(names, min(args.samples, len(names)))
+    misses = [hashlib.sha256(f'missing-{i}'.encode()).hexdigest() for i in range(args.samples)]
+
+    for layout in (flat_path, sharded_path):
+        with tempfile.TemporaryDirectory() as root:
+            start = time.perf_counter()
+            populate(root, names, layout)
+            created = time.perf_counter() - start
+
+            exists_hit = measure(os.path.exists, [layout(root, n) for n in hits])
+            exists_miss = measure(os.path.exists, [layout(root, n) for n in misses])
+            stat_hit = measure(os.stat, [layout(root, n) for n in hits])
+
+            start = time.perf_counter()
+            assert walk(root) == len(names)
+            walked = time.perf_counter() - start
+
+            print(f"{layout.__name__:13} create {created:7.2f} s  exists hit {exists_hit:6.1f} us  "
+                  f"miss {exists_miss:6.1f} us  stat {stat_hit:6.1f} us  scandir walk {walked:6.2f} s")
+
+if __name__ == '__main__':
+    main()
@@ -5,13 +5,19 @@ Handles CRUD operations for task-related comments and collaborative discussions
 """
 
 import os
+import io
+import re
+import csv
+import json
 import logging
 import secrets
-from datetime import datetime
+from datetime import datetime, timedelta
 from functools import wraps
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from sqlalchemy.dialects import postgresql, sqlite
+from celery import Celery
 import requests
 
 # Configuration
@@ -22,6 +28,24 @@ class Config:
     USER_SERVICE_URL = os.environ.get('USER_SERVICE_URL', 'http://localhost:5001')
     PROJECT_TASK_SERVICE_URL = os.environ.get('PROJECT_TASK_SERVICE_URL', 'http://localhost:5002')
     ACTIVITY_LOG_SERVICE_URL = os.environ.get('ACTIVITY_LOG_SERVICE_URL', 'http://localhost:5006')
+    
+    # Comment thread pagination
+    COMMENTS_PAGE_SIZE = int(os.environ.get('COMMENTS_PAGE_SIZE', 50))
+    COMMENTS_MAX_PAGE_SIZE = int(os.environ.get('COMMENTS_MAX_PAGE_SIZE', 200))
+    MAX_BATCH_TASK_IDS = int(os.environ.get('MAX_BATCH_TASK_IDS', 10000))  # Task ids accepted by batch endpoints
+    BATCH_QUERY_CHUNK_SIZE = 1000  # Keep IN lists well under driver/SQLite parameter limits
+    SEARCH_MAX_PER_PAGE = int(os.environ.get('COMMENT_SEARCH_MAX_PER_PAGE', 50))
+    USER_LOOKUP_BATCH_SIZE = int(os.environ.get('USER_LOOKUP_BATCH_SIZE', 1000))  # Authors resolved per User Service call
+    
+    # Celery for background bulk deletes
+    CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/5')
+    CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', 'redis://localhost:6379/5')
+    BULK_DELETE_TASK_CHUNK = int(os.environ.get('BULK_DELETE_TASK_CHUNK', 100))  # Task ids handled per step
+    BULK_DELETE_BATCH_SIZE = int(os.environ.get('BULK_DELETE_BATCH_SIZE', 1000))  # Comments deleted per transaction
+    BULK_DELETE_STALE_MINUTES = int(os.environ.get('BULK_DELETE_STALE_MINUTES', 15))  # A running job without progress for this long is presumed abandoned
+    
+    # Streaming export
+    EXPORT_BATCH_SIZE = int(os.environ.get('COMMENT_EXPORT_BATCH_SIZE', 1000))  # Rows fetched per server-side cursor batch
 
 # Application setup
 app = Flask(__name__)
@@ -30,6 +54,17 @@ app.config.from_object(Config)
 db = SQLAlchemy(app)
 migrate = Migrate(app, db)
 
+# Celery setup
+celery = Celery(app.name, broker=app.config['CELERY_BROKER_URL'])
+celery.conf.update(app.config)
+
+class FlaskCeleryTask(celery.Task):
+    def __call__(self, *args, **kwargs):
+        with app.app_context():
+            return self.run(*args, **kwargs)
+
+celery.Task = FlaskCeleryTask
+
 # Logging setup
 logging.basicConfig(
     level=logging.INFO,
@@ -44,6 +79,9 @@ logger = logging.getLogger(__name__)
 # Models
 class Comment(db.Model):
     __tablename__ = 'comments'
+    __table_args__ = (
+        db.Index('ix_comments_task_id_created_at_id', 'task_id', 'created_at', 'id'),  # Keyset pagination per task
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.Text, nullable=False)
@@ -62,6 +100,88 @@ class Comment(db.Model):
             'author_id': self.author_id
         }
 
+class TaskCommentStats(db.Model):
+    """Maintained per-task comment count and latest comment, kept in step with the comments table"""
+    __tablename__ = 'task_comment_stats'
+    
+    task_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    comment_count = db.Column(db.Integer, nullable=False, default=0)
+    last_comment_at = db.Column(db.DateTime)
+    last_author_id = db.Column(db.Integer)
+    
+    def to_dict(self):
+        return {
+            'task_id': self.task_id,
+            'comment_count': self.comment_count,
+            'last_comment_at': self.last_comment_at.isoformat() if self.last_comment_at else None,
+            'last_author_id': self.last_author_id
+        }
+
+class CommentDeleteJob(db.Model):
+    """Background bulk delete of the comments of deleted tasks, with resumable progress"""
+    __tablename__ = 'comment_delete_jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    task_ids = db.Column(db.JSON, nullable=False)
+    status = db.Column(db.String(20), default='pending')  # pending, running, completed, failed
+    processed_tasks = db.Column(db.Integer, nullable=False, default=0)  # Prefix of task_ids fully deleted
+    deleted_count = db.Column(db.Integer, nullable=False, default=0)
+    error_message = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    completed_at = db.Column(db.DateTime)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'total_tasks': len(self.task_ids),
+            'processed_tasks': self.processed_tasks,
+            'deleted_count': self.deleted_count,
+            'error_message': self.error_message,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat(),
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
+
+# Full-text search over comment content.
+# Postgres keeps a generated tsvector column with a GIN index; SQLite keeps an
+# external-content FTS5 table in sync with triggers. Both are created with the comments table.
+COMMENT_SEARCH_DDL = {
+    'postgresql': [
+        "ALTER TABLE comments ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('english', coalesce(content, ''))) STORED",
+        "CREATE INDEX IF NOT EXISTS ix_comments_search_vector ON comments USING GIN (search_vector)",
+    ],
+    'sqlite': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS comments_fts USING fts5("
+        "content, content='comments', content_rowid='id', tokenize='porter unicode61')",
+        "CREATE TRIGGER IF NOT EXISTS comments_fts_ai AFTER INSERT ON comments BEGIN "
+        "INSERT INTO comments_fts(rowid, content) VALUES (new.id, new.content); END",
+        "CREATE TRIGGER IF NOT EXISTS comments_fts_ad AFTER DELETE ON comments BEGIN "
+        "INSERT INTO comments_fts(comments_fts, rowid, content) VALUES ('delete', old.id, old.content); END",
+        "CREATE TRIGGER IF NOT EXISTS comments_fts_au AFTER UPDATE OF content ON comments BEGIN "
+        "INSERT INTO comments_fts(comments_fts, rowid, content) VALUES ('delete', old.id, old.content); "
+        "INSERT INTO comments_fts(rowid, content) VALUES (new.id, new.content); END",
+    ],
+}
+SNIPPET_MARK = '**'  # Plain-text highlight around matched terms (comment content is not HTML-escaped)
+
+@db.event.listens_for(Comment.__table__, 'after_create')
+def create_comment_search_index(target, connection, **kw):
+    """Create the dialect's full-text index alongside the comments table"""
+    for statement in COMMENT_SEARCH_DDL.get(connection.dialect.name, []):
+        connection.execute(db.text(statement))
+
+# SQL shared by the rebuild command; the latest author comes from the (task_id, created_at, id) index
+REBUILD_COMMENT_STATS_SQL = (
+    "INSERT INTO task_comment_stats (task_id, comment_count, last_comment_at, last_author_id) "
+    "SELECT c.task_id, COUNT(*), MAX(c.created_at), "
+    "(SELECT l.author_id FROM comments l WHERE l.task_id = c.task_id "
+    "ORDER BY l.created_at DESC, l.id DESC LIMIT 1) "
+    "FROM comments c GROUP BY c.task_id"
+)
+
 # Utility functions
 def verify_user_token(token: str) -> dict:
     """Verify token with User Service"""
@@ -109,6 +229,139 @@ def get_user_info(user_id: int, token: str) -> dict:
         logger.error(f"Failed to get user info: {e}")
         return None
 
+def lookup_usernames(user_ids: list, token: str):
+    """Usernames of up to USER_LOOKUP_BATCH_SIZE users in one call to User Service; None if the lookup failed"""
+    try:
+        response = requests.post(
+            f"{app.config['USER_SERVICE_URL']}/api/users/lookup",
+            json={'user_ids': user_ids},
+            headers={'Authorization': f'Bearer {token}'},
+            timeout=5
+        )
+        if response.status_code == 404:
+            # User Service without the batch endpoint: resolve one by one
+            return {user_id: (get_user_info(user_id, token) or {}).get('username') for user_id in user_ids}
+        if response.status_code == 200:
+            users = response.json().get('users', {})
+            return {user_id: users.get(str(user_id), {}).get('username') for user_id in user_ids}
+        logger.error(f"User lookup failed: {response.status_code}")
+        return None
+    except Exception as e:
+        logger.error(f"Failed to look up users: {e}")
+        return None
+
+def get_author_names(author_ids, token: str) -> dict:
+    """Resolve each distinct author once, USER_LOOKUP_BATCH_SIZE authors per call"""
+    author_ids = sorted(set(author_ids))
+    batch_size = app.config['USER_LOOKUP_BATCH_SIZE']
+    names = {}
+    for start in range(0, len(author_ids), batch_size):
+        batch = author_ids[start:start + batch_size]
+        usernames = lookup_usernames(batch, token) or {}
+        for author_id in batch:
+            names[author_id] = usernames.get(author_id) or 'Unknown'
+    return names
+
+def parse_comment_cursor(cursor: str):
+    """Parse a pagination cursor of the form <iso created_at>,<id>"""
+    cursor_ts, cursor_id = cursor.rsplit(',', 1)
+    return datetime.fromisoformat(cursor_ts), int(cursor_id)
+
+def comment_cursor(comment) -> str:
+    return f"{comment.created_at.isoformat()},{comment.id}"
+
+def verify_tasks_access(task_ids: list, user_id: int) -> list:
+    """Return the subset of task_ids the user can access, in one call to Project & Task Service"""
+    try:
+        response = requests.post(
+            f"{app.config['PROJECT_TASK_SERVICE_URL']}/api/tasks/verify",
+            json={'task_ids': task_ids, 'user_id': user_id},
+            timeout=10
+        )
+        if response.status_code == 200:
+            return response.json().get('task_ids', [])
+        return None
+    except Exception as e:
+        logger.error(f"Failed to verify access to tasks: {e}")
+        return None
+
+def search_comment_ids(terms: list, task_ids: list, limit: int, offset: int) -> list:
+    """Return [(comment_id, rank, snippet)] for comments on task_ids matching all terms, best match first"""
+    params = {'task_ids': task_ids, 'limit': limit, 'offset': offset}
+    
+    if db.engine.dialect.name == 'postgresql':
+        params['query'] = ' & '.join(terms)
+        # Rank and page first, then build headlines only for the returned rows
+        sql = f"""
+            SELECT ranked.id, ranked.rank,
+                   ts_headline('english', ranked.content, to_tsquery('english', :query),
+                               'StartSel={SNIPPET_MARK}, StopSel={SNIPPET_MARK}, MaxWords=24, MinWords=8')
+            FROM (
+                SELECT comments.id, comments.content, ts_rank(comments.search_vector, query) AS rank
+                FROM comments, to_tsquery('english', :query) AS query
+                WHERE comments.search_vector @@ query AND comments.task_id IN :task_ids
+                ORDER BY rank DESC, comments.id
+                LIMIT :limit OFFSET :offset
+            ) AS ranked
+            ORDER BY ranked.rank DESC, ranked.id
+        """
+    else:
+        # Quote every term so user input cannot inject FTS5 syntax
+        params['query'] = ' '.join(f'"{term}"' for term in terms)
+        sql = f"""
+            SELECT comments.id, -bm25(comments_fts) AS rank,
+                   snippet(comments_fts, 0, '{SNIPPET_MARK}', '{SNIPPET_MARK}', '...', 16)
+            FROM comments_fts JOIN comments ON comments.id = comments_fts.rowid
+            WHERE comments_fts MATCH :query AND comments.task_id IN :task_ids
+            ORDER BY bm25(comments_fts), comments.id
+            LIMIT :limit OFFSET :offset
+        """
+    
+    statement = db.text(sql).bindparams(db.bindparam('task_ids', expanding=True))
+    return [(row[0], row[1], row[2]) for row in db.session.execute(statement, params)]
+
+def parse_task_ids(data):
+    """Validate the task_ids list of a batch request; returns (unique ids, error response)"""
+    task_ids = data.get('task_ids') if data else None
+    if not isinstance(task_ids, list) or not task_ids:
+        return None, (jsonify({'error': 'task_ids must be a non-empty list'}), 400)
+    if len(task_ids) > app.config['MAX_BATCH_TASK_IDS']:
+        return None, (jsonify({'error': f"At most {app.config['MAX_BATCH_TASK_IDS']} task_ids per request"}), 400)
+    try:
+        return sorted({int(task_id) for task_id in task_ids}), None
+    except (TypeError, ValueError):
+        return None, (jsonify({'error': 'task_ids must be integers'}), 400)
+
+def record_comment_added(comment):
+    """Count a new comment in its task's stats row within the current transaction"""
+    dialect_insert = postgresql.insert if db.engine.dialect.name == 'postgresql' else sqlite.insert
+    statement = dialect_insert(TaskCommentStats).values(
+        task_id=comment.task_id,
+        comment_count=1,
+        last_comment_at=comment.created_at,
+        last_author_id=comment.author_id
+    )
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=['task_id'],
+        set_={
+            'comment_count': TaskCommentStats.comment_count + 1,
+            'last_comment_at': statement.excluded.last_comment_at,
+            'last_author_id': statement.excluded.last_author_id
+        }
+    ))
+
+def record_comment_removed(task_id: int):
+    """Uncount a deleted comment (already flushed) and point the stats row at the new latest comment"""
+    latest = db.session.query(Comment.created_at, Comment.author_id).filter(
+        Comment.task_id == task_id
+    ).order_by(Comment.created_at.desc(), Comment.id.desc()).first()
+    
+    TaskCommentStats.query.filter_by(task_id=task_id).update({
+        'comment_count': TaskCommentStats.comment_count - 1,
+        'last_comment_at': latest.created_at if latest else None,
+        'last_author_id': latest.author_id if latest else None
+    }, synchronize_session=False)
+
 def log_activity(user_id: int, action: str, entity_type: str, entity_id: int, details: dict = None):
     """Log activity to Activity Log Service"""
     try:
@@ -152,6 +405,127 @@ def token_required(f):
         return f(*args, **kwargs)
     return decorated
 
+EXPORT_COLUMNS = ('id', 'task_id', 'author_id', 'author_name', 'content', 'created_at', 'updated_at')
+EXPORT_FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+def generate_comment_export(task_ids: list, export_format: str, token: str):
+    """Yield comments of task_ids as NDJSON lines or CSV rows, one cursor batch at a time"""
+    statement = db.select(
+        Comment.id, Comment.task_id, Comment.author_id, Comment.content, Comment.created_at, Comment.updated_at
+    ).where(Comment.task_id.in_(task_ids)).order_by(
+        Comment.task_id, Comment.created_at, Comment.id
+    ).execution_options(yield_per=app.config['EXPORT_BATCH_SIZE'])
+    
+    author_names = {}
+    if export_format == 'csv':
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(EXPORT_COLUMNS)
+        yield buffer.getvalue()
+    
+    # Plain rows rather than ORM objects, so nothing accumulates in the session's identity map
+    for rows in db.session.execute(statement).partitions():
+        new_author_ids = {row.author_id for row in rows} - author_names.keys()
+        author_names.update(get_author_names(new_author_ids, token))
+        
+        records = [{
+            'id': row.id,
+            'task_id': row.task_id,
+            'author_id': row.author_id,
+            'author_name': author_names[row.author_id],
+            'content': row.content,
+            'created_at': row.created_at.isoformat(),
+            'updated_at': row.updated_at.isoformat()
+        } for row in rows]
+        
+        if export_format == 'csv':
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+            writer.writerows(records)
+            yield buffer.getvalue()
+        else:
+            yield ''.join(json.dumps(record) + '\n' for record in records)
+
+def claim_comment_delete_job(job_id: int) -> bool:
+    """Mark a job running for this worker unless another worker is still making progress on it
+    
+    updated_at moves with every committed batch, so it doubles as the running worker's heartbeat.
+    """
+    stale_before = datetime.utcnow() - timedelta(minutes=app.config['BULK_DELETE_STALE_MINUTES'])
+    claimed = CommentDeleteJob.query.filter(
+        CommentDeleteJob.id == job_id,
+        db.or_(
+            CommentDeleteJob.status.in_(['pending', 'failed']),
+            db.and_(CommentDeleteJob.status == 'running', CommentDeleteJob.updated_at < stale_before)
+        )
+    ).update({'status': 'running', 'updated_at': datetime.utcnow()}, synchronize_session=False)
+    db.session.commit()
+    return claimed == 1
+
+# Celery Tasks
+@celery.task(bind=True, max_retries=5, acks_late=True, reject_on_worker_lost=True)
+def run_comment_delete_job(self, job_id: int):
+    """Delete the comments of a job's tasks in short, bounded transactions.
+
+    Progress is committed after every task chunk and deletes are idempotent, so a retry
+    or a redelivery after a worker crash resumes from the last finished chunk.
+    """
+    job = CommentDeleteJob.query.get(job_id)
+    if not job:
+        logger.error(f"Comment delete job {job_id} not found")
+        return {'status': 'error', 'message': 'Job not found'}
+    if job.status == 'completed':
+        return {'status': 'success', 'deleted_count': job.deleted_count}
+    
+    if not claim_comment_delete_job(job_id):
+        logger.info(f"Comment delete job {job_id} is already being run by another worker")
+        return {'status': 'skipped', 'message': 'Job already running'}
+    db.session.refresh(job)
+    
+    try:
+        task_chunk = app.config['BULK_DELETE_TASK_CHUNK']
+        batch_size = app.config['BULK_DELETE_BATCH_SIZE']
+        
+        while job.processed_tasks < len(job.task_ids):
+            chunk = job.task_ids[job.processed_tasks:job.processed_tasks + task_chunk]
+            
+            # Delete at most batch_size comments per transaction to keep lock times short
+            while True:
+                batch_ids = db.session.query(Comment.id).filter(Comment.task_id.in_(chunk)).limit(batch_size).subquery()
+                deleted = Comment.query.filter(Comment.id.in_(db.select(batch_ids.c.id))).delete(synchronize_session=False)
+                job.deleted_count += deleted
+                db.session.commit()
+                if deleted < batch_size:
+                    break
+            
+            TaskCommentStats.query.filter(TaskCommentStats.task_id.in_(chunk)).delete(synchronize_session=False)
+            job.processed_tasks += len(chunk)
+            db.session.commit()
+        
+        job.status = 'completed'
+        job.completed_at = datetime.utcnow()
+        db.session.commit()
+        
+        logger.info(f"Comment delete job {job_id} removed {job.deleted_count} comments for {len(job.task_ids)} tasks")
+        return {'status': 'success', 'deleted_count': job.deleted_count}
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Comment delete job {job_id} failed: {e}")
+        
+        # Retry with exponential backoff, resuming from the committed progress; hand the claim back first
+        if self.request.retries < self.max_retries:
+            CommentDeleteJob.query.filter_by(id=job_id, status='running').update(
+                {'status': 'pending'}, synchronize_session=False
+            )
+            db.session.commit()
+            raise self.retry(exc=e, countdown=30 * 2 ** self.request.retries)
+        
+        job = CommentDeleteJob.query.get(job_id)
+        job.status = 'failed'
+        job.error_message = str(e)
+        db.session.commit()
+        return {'status': 'error', 'message': str(e)}
+
 # Comment Routes
 @app.route('/api/tasks/<int:task_id>/comments', methods=['POST'])
 @token_required
@@ -174,11 +548,13 @@ def add_comment(task_id):
         
         comment = Comment(
             content=data['content'].strip(),
+            created_at=datetime.utcnow(),
             task_id=task_id,
             author_id=user_id
         )
         
         db.session.add(comment)
+        record_comment_added(comment)
         db.session.commit()
         
         log_activity(user_id, 'add_comment', 'comment', comment.id, {
@@ -205,31 +581,178 @@ def add_comment(task_id):
 @app.route('/api/tasks/<int:task_id>/comments', methods=['GET'])
 @token_required
 def get_comments(task_id):
-    """Get all comments for a task"""
+    """Get a page of comments for a task, oldest first.
+
+    Keyset-paginated on (created_at, id): pass ?after=<next_cursor> for newer
+    comments or ?before=<prev_cursor> for older ones; ?limit sets the page size.
+    """
     try:
         user_id = request.current_user['id']
         
+        limit = request.args.get('limit', app.config['COMMENTS_PAGE_SIZE'], type=int)
+        limit = min(max(limit, 1), app.config['COMMENTS_MAX_PAGE_SIZE'])
+        after = request.args.get('after')
+        before = request.args.get('before')
+        if after and before:
+            return jsonify({'error': 'Use either after or before, not both'}), 400
+        
+        try:
+            cursor_ts, cursor_id = parse_comment_cursor(after or before) if (after or before) else (None, None)
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        
         # Verify task access
         task_access = verify_task_access(task_id, user_id)
         if not task_access or not task_access.get('has_access'):
             return jsonify({'error': 'Task not found or access denied'}), 404
         
-        comments = Comment.query.filter_by(task_id=task_id).order_by(Comment.created_at.asc()).all()
+        query = Comment.query.filter_by(task_id=task_id)
+        if before:
+            # Walk backwards from the cursor, then flip the page back to oldest-first
+            comments = query.filter(db.or_(
+                Comment.created_at < cursor_ts,
+                db.and_(Comment.created_at == cursor_ts, Comment.id < cursor_id)
+            )).order_by(Comment.created_at.desc(), Comment.id.desc()).limit(limit + 1).all()
+            has_more = len(comments) > limit
+            comments = comments[:limit][::-1]
+            prev_cursor = comment_cursor(comments[0]) if has_more else None
+            next_cursor = comment_cursor(comments[-1]) if comments else before
+        else:
+            if after:
+                query = query.filter(db.or_(
+                    Comment.created_at > cursor_ts,
+                    db.and_(Comment.created_at == cursor_ts, Comment.id > cursor_id)
+                ))
+            comments = query.order_by(Comment.created_at.asc(), Comment.id.asc()).limit(limit + 1).all()
+            has_more = len(comments) > limit
+            comments = comments[:limit]
+            next_cursor = comment_cursor(comments[-1]) if has_more else None
+            prev_cursor = (comment_cursor(comments[0]) if comments else after) if after else None
         
         # Enrich comments with author information
+        author_names = get_author_names([c.author_id for c in comments], request.token)
         enriched_comments = []
         for comment in comments:
             comment_dict = comment.to_dict()
-            author_info = get_user_info(comment.author_id, request.token)
-            comment_dict['author_name'] = author_info.get('username') if author_info else 'Unknown'
+            comment_dict['author_name'] = author_names[comment.author_id]
             enriched_comments.append(comment_dict)
         
-        return jsonify({'comments': enriched_comments})
+        return jsonify({
+            'comments': enriched_comments,
+            'pagination': {
+                'limit': limit,
+                'next_cursor': next_cursor,
+                'prev_cursor': prev_cursor
+            }
+        })
         
     except Exception as e:
         logger.error(f"Failed to get comments for task {task_id}: {e}")
         return jsonify({'error': 'Failed to retrieve comments'}), 500
 
+@app.route('/api/comments/search', methods=['POST'])
+@token_required
+def search_comments():
+    """Ranked full-text search over comments on the given task_ids, with highlighted snippets"""
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'Invalid JSON payload'}), 400
+        
+        user_id = request.current_user['id']
+        
+        terms = re.findall(r'\w+', data.get('q') or '')[:10]
+        if not terms:
+            return jsonify({'error': 'Search query is required'}), 400
+        
+        task_ids, error = parse_task_ids(data)
+        if error:
+            return error
+        
+        try:
+            page = max(int(data.get('page', 1)), 1)
+            per_page = min(max(int(data.get('per_page', 20)), 1), app.config['SEARCH_MAX_PER_PAGE'])
+        except (TypeError, ValueError):
+            return jsonify({'error': 'page and per_page must be integers'}), 400
+        
+        # Authorise the whole task set in one call, then search only the accessible tasks
+        accessible_task_ids = verify_tasks_access(task_ids, user_id)
+        if accessible_task_ids is None:
+            return jsonify({'error': 'Failed to verify task access'}), 502
+        
+        matches = []
+        if accessible_task_ids:
+            # Fetch one extra row to know whether another page exists without counting all matches
+            matches = search_comment_ids(terms, accessible_task_ids, per_page + 1, (page - 1) * per_page)
+        has_next = len(matches) > per_page
+        matches = matches[:per_page]
+        
+        comments = {c.id: c for c in Comment.query.filter(Comment.id.in_([m[0] for m in matches])).all()} if matches else {}
+        author_names = get_author_names([c.author_id for c in comments.values()], request.token)
+        results = []
+        for comment_id, rank, snippet in matches:
+            if comment_id in comments:
+                comment_dict = comments[comment_id].to_dict()
+                comment_dict['author_name'] = author_names[comment_dict['author_id']]
+                comment_dict['snippet'] = snippet
+                comment_dict['rank'] = float(rank)
+                results.append(comment_dict)
+        
+        return jsonify({
+            'comments': results,
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'has_next': has_next
+            }
+        })
+        
+    except Exception as e:
+        logger.error(f"Failed to search comments: {e}")
+        return jsonify({'error': 'Failed to search comments'}), 500
+
+@app.route('/api/comments/export', methods=['POST'])
+@token_required
+def export_comments():
+    """Stream all comments of the given task_ids as NDJSON (default) or CSV (?format=csv)"""
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'Invalid JSON payload'}), 400
+        
+        user_id = request.current_user['id']
+        
+        export_format = request.args.get('format', data.get('format', 'ndjson'))
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({'error': f'Invalid format. Must be one of {list(EXPORT_FORMATS)}'}), 400
+        
+        task_ids, error = parse_task_ids(data)
+        if error:
+            return error
+        
+        accessible_task_ids = verify_tasks_access(task_ids, user_id)
+        if accessible_task_ids is None:
+            return jsonify({'error': 'Failed to verify task access'}), 502
+        
+        denied = sorted(set(task_ids) - set(accessible_task_ids))
+        if denied:
+            return jsonify({'error': 'Task not found or access denied', 'task_ids': denied[:100]}), 404
+        
+        log_activity(user_id, 'export_comments', 'task', task_ids[0], {
+            'task_count': len(task_ids),
+            'format': export_format
+        })
+        
+        return Response(
+            stream_with_context(generate_comment_export(task_ids, export_format, request.token)),
+            mimetype=EXPORT_FORMATS[export_format],
+            headers={'Content-Disposition': f'attachment; filename=comments-export.{export_format}'}
+        )
+        
+    except Exception as e:
+        logger.error(f"Failed to export comments: {e}")
+        return jsonify({'error': 'Failed to export comments'}), 500
+
 @app.route('/api/comments/<int:comment_id>', methods=['GET'])
 @token_required
 def get_comment(comment_id):
@@ -333,6 +856,8 @@ def delete_comment(comment_id):
         task_id = comment.task_id
         
         db.session.delete(comment)
+        db.session.flush()
+        record_comment_removed(task_id)
         db.session.commit()
         
         log_activity(user_id, 'delete', 'comment', comment_id, {
@@ -351,38 +876,86 @@ def delete_comment(comment_id):
 # Utility endpoints for other services
 @app.route('/api/comments/count/<int:task_id>', methods=['GET'])
 def get_comment_count(task_id):
-    """Get comment count for a task (for other services)"""
+    """Get comment count and latest comment time for a task (for other services)"""
     try:
-        count = Comment.query.filter_by(task_id=task_id).count()
-        return jsonify({'task_id': task_id, 'comment_count': count})
+        stats = TaskCommentStats.query.get(task_id)
+        if not stats:
+            return jsonify({'task_id': task_id, 'comment_count': 0, 'last_comment_at': None, 'last_author_id': None})
+        return jsonify(stats.to_dict())
     except Exception as e:
         logger.error(f"Failed to get comment count for task {task_id}: {e}")
         return jsonify({'error': 'Failed to get comment count'}), 500
 
+@app.route('/api/comments/counts', methods=['POST'])
+def get_comment_counts():
+    """Get comment counts for many tasks at once (for other services)"""
+    try:
+        data = request.get_json()
+        task_ids, error = parse_task_ids(data)
+        if error:
+            return error
+        
+        counts = {task_id: 0 for task_id in task_ids}
+        chunk_size = app.config['BATCH_QUERY_CHUNK_SIZE']
+        for start in range(0, len(task_ids), chunk_size):
+            chunk = task_ids[start:start + chunk_size]
+            for task_id, count in db.session.query(TaskCommentStats.task_id, TaskCommentStats.comment_count).filter(
+                TaskCommentStats.task_id.in_(chunk)
+            ):
+                counts[task_id] = count
+        
+        return jsonify({'counts': counts})
+        
+    except Exception as e:
+        logger.error(f"Failed to get comment counts: {e}")
+        return jsonify({'error': 'Failed to get comment counts'}), 500
+
 @app.route('/api/comments/bulk-delete', methods=['POST'])
 def bulk_delete_comments():
-    """Bulk delete comments for tasks (for other services when tasks are deleted)"""
+    """Queue a background delete of comments for tasks (for other services when tasks are deleted)"""
     try:
         data = request.get_json()
-        task_ids = data.get('task_ids', [])
+        task_ids, error = parse_task_ids(data)
+        if error:
+            return error
         
-        if not task_ids:
-            return jsonify({'error': 'No task IDs provided'}), 400
-        
-        deleted_count = Comment.query.filter(Comment.task_id.in_(task_ids)).delete(synchronize_session=False)
+        job = CommentDeleteJob(task_ids=task_ids)
+        db.session.add(job)
         db.session.commit()
         
-        logger.info(f"Bulk deleted {deleted_count} comments for tasks: {task_ids}")
+        try:
+            run_comment_delete_job.delay(job.id)
+        except Exception as e:
+            # Without a queued job nothing would run; let the caller retry
+            logger.error(f"Failed to queue comment delete job {job.id}: {e}")
+            job.status = 'failed'
+            job.error_message = 'Failed to queue job'
+            db.session.commit()
+            return jsonify({'error': 'Failed to queue bulk delete'}), 503
+        
+        logger.info(f"Queued comment delete job {job.id} for {len(task_ids)} tasks")
         return jsonify({
-            'message': f'Successfully deleted {deleted_count} comments',
-            'deleted_count': deleted_count
-        })
+            'message': 'Bulk delete queued',
+            'job': job.to_dict()
+        }), 202
         
     except Exception as e:
         db.session.rollback()
         logger.error(f"Failed to bulk delete comments: {e}")
         return jsonify({'error': 'Failed to bulk delete comments'}), 500
 
+@app.route('/api/comments/bulk-delete/<int:job_id>', methods=['GET'])
+def get_bulk_delete_job(job_id):
+    """Get the progress of a bulk delete job (for other services)"""
+    try:
+        job = CommentDeleteJob.query.get(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify({'job': job.to_dict()})
+    except Exception as e:
+        logger.error(f"Failed to get comment delete job {job_id}: {e}")
+        return jsonify({'error': 'Failed to get bulk delete job'}), 500
+
 @app.route('/health')
 def health_check():
     """Health check endpoint"""
@@ -422,6 +995,32 @@ def internal_error(error):
     db.session.rollback()
     return jsonify({'error': 'Internal Server Error'}), 500
 
+@app.cli.command('rebuild-comment-stats')
+def rebuild_comment_stats():
+    """Recompute task_comment_stats from the comments table (repairs any drift)"""
+    TaskCommentStats.query.delete(synchronize_session=False)
+    db.session.execute(db.text(REBUILD_COMMENT_STATS_SQL))
+    db.session.commit()
+    logger.info(f"Rebuilt comment stats for {TaskCommentStats.query.count()} tasks")
+
+@app.cli.command('resume-comment-delete-jobs')
+def resume_comment_delete_jobs():
+    """Re-queue bulk delete jobs that never finished (e.g. after a broker outage)
+    
+    Running jobs are only picked up once they have made no progress for BULK_DELETE_STALE_MINUTES;
+    the worker claims the job again before touching it either way.
+    """
+    stale_before = datetime.utcnow() - timedelta(minutes=app.config['BULK_DELETE_STALE_MINUTES'])
+    jobs = CommentDeleteJob.query.filter(db.or_(
+        CommentDeleteJob.status.in_(['pending', 'failed']),
+        db.and_(CommentDeleteJob.status == 'running', CommentDeleteJob.updated_at < stale_before)
+    )).all()
+    for job in jobs:
+        job.error_message = None
+        db.session.commit()
+        run_comment_delete_job.delay(job.id)
+    logger.info(f"Re-queued {len(jobs)} comment delete jobs")
+
 # Database initialization
 def init_db():
     """Initialize database"""
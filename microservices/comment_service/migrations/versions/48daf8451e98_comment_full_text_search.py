@@ -0,0 +1,58 @@
+"""comment full text search
+
+Revision ID: 48daf8451e98
+Revises: 3ca7a5f27b73
+Create Date: 2026-10-19 02:02:37.387194
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '48daf8451e98'
+down_revision = '3ca7a5f27b73'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute(
+            "ALTER TABLE comments ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            "GENERATED ALWAYS AS (to_tsvector('english', coalesce(content, ''))) STORED"
+        )
+        op.execute("CREATE INDEX IF NOT EXISTS ix_comments_search_vector ON comments USING GIN (search_vector)")
+    elif bind.dialect.name == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS comments_fts USING fts5("
+            "content, content='comments', content_rowid='id', tokenize='porter unicode61')"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS comments_fts_ai AFTER INSERT ON comments BEGIN "
+            "INSERT INTO comments_fts(rowid, content) VALUES (new.id, new.content); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS comments_fts_ad AFTER DELETE ON comments BEGIN "
+            "INSERT INTO comments_fts(comments_fts, rowid, content) VALUES ('delete', old.id, old.content); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS comments_fts_au AFTER UPDATE OF content ON comments BEGIN "
+            "INSERT INTO comments_fts(comments_fts, rowid, content) VALUES ('delete', old.id, old.content); "
+            "INSERT INTO comments_fts(rowid, content) VALUES (new.id, new.content); END"
+        )
+        # Index existing rows
+        op.execute("INSERT INTO comments_fts(comments_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_comments_search_vector")
+        op.execute("ALTER TABLE comments DROP COLUMN IF EXISTS search_vector")
+    elif bind.dialect.name == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS comments_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS comments_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS comments_fts_ai")
+        op.execute("DROP TABLE IF EXISTS comments_fts")
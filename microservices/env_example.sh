@@ -35,9 +35,10 @@ REDIS_PORT=6379
 
 # Redis URLs for different services (using different databases)
 USER_SERVICE_REDIS_URL=redis://redis:6379/0
-PROJECT_TASK_SERVICE_REDIS_URL=redis://redis:6379/0
+PROJECT_TASK_SERVICE_REDIS_URL=redis://redis:6379/4
 COMMENT_SERVICE_REDIS_URL=redis://redis:6379/0
 ATTACHMENT_SERVICE_REDIS_URL=redis://redis:6379/0
+ATTACHMENT_SERVICE_CELERY_BROKER_URL=redis://redis:6379/6  # Preview generation worker
 NOTIFICATION_SERVICE_REDIS_URL=redis://redis:6379/1
 ACTIVITY_LOG_SERVICE_REDIS_URL=redis://redis:6379/2
 REPORTING_SERVICE_REDIS_URL=redis://redis:6379/3
@@ -57,6 +58,20 @@ ACTIVITY_LOG_SERVICE_CELERY_RESULT_BACKEND=redis://redis:6379/2
 REPORTING_SERVICE_CELERY_BROKER_URL=redis://redis:6379/3
 REPORTING_SERVICE_CELERY_RESULT_BACKEND=redis://redis:6379/3
 
+# Project & Task Service Celery (downstream cleanup after deletes)
+PROJECT_TASK_SERVICE_CELERY_BROKER_URL=redis://redis:6379/4
+PROJECT_TASK_SERVICE_CELERY_RESULT_BACKEND=redis://redis:6379/4
+
+# Comment Service Celery (chunked bulk deletes)
+COMMENT_SERVICE_CELERY_BROKER_URL=redis://redis:6379/5
+COMMENT_SERVICE_CELERY_RESULT_BACKEND=redis://redis:6379/5
+
+# Project & Task Service read-through cache for project/task reads (opt-in)
+PROJECT_TASK_READ_CACHE_ENABLED=false
+
+# Days a completed/archived project stays in the hot tables before the nightly archive job moves it
+PROJECT_TASK_ARCHIVE_AFTER_DAYS=30
+
 # =============================================================================
 # SECURITY CONFIGURATION
 # =============================================================================
@@ -98,6 +113,21 @@ MAIL_FROM=noreply@taskapp.com
 # =============================================================================
 UPLOAD_FOLDER=/app/uploads
 MAX_CONTENT_LENGTH=16777216  # 16MB in bytes
+UPLOAD_BUFFER_SIZE=1048576  # Write buffer for streamed uploads
+UPLOAD_CHUNK_SIZE=8388608  # Default chunk size of resumable uploads (8MB)
+MAX_RESUMABLE_UPLOAD_SIZE=5368709120  # 5GB
+UPLOAD_FLAT_FALLBACK=true  # Also look in the pre-sharding flat layout until `flask shard-uploads` has run
+ATTACHMENT_RECONCILE_REMOVE_ORPHANS=false  # Nightly reconciliation only reports orphan files unless true
+ATTACHMENT_DOWNLOAD_MODE=direct  # x-accel: let nginx serve download bytes (requires the nginx container)
+
+# Attachment blob storage: local (UPLOAD_FOLDER) or s3 (AWS S3 / MinIO)
+ATTACHMENT_STORAGE_BACKEND=local
+ATTACHMENT_S3_BUCKET=attachments
+ATTACHMENT_S3_ENDPOINT_URL=http://minio:9000  # Leave empty for AWS
+ATTACHMENT_S3_PUBLIC_ENDPOINT_URL=http://localhost:9000  # Host used in presigned URLs handed to clients
+ATTACHMENT_S3_REGION=us-east-1
+ATTACHMENT_S3_ACCESS_KEY_ID=minioadmin
+ATTACHMENT_S3_SECRET_ACCESS_KEY=minioadmin
 
 # =============================================================================
 # LOGGING CONFIGURATION
@@ -5,13 +5,20 @@ Handles CRUD operations for projects and tasks, workflows, statuses, and priorit
 """
 
 import os
+import re
+import json
+import time
 import logging
 import secrets
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from functools import wraps
 from flask import Flask, request, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from sqlalchemy.dialects import postgresql, sqlite
+from celery import Celery
+from celery.schedules import crontab
+import redis
 import requests
 
 # Configuration
@@ -20,7 +27,32 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SECRET_KEY = os.environ.get('SECRET_KEY', secrets.token_hex(32))
     USER_SERVICE_URL = os.environ.get('USER_SERVICE_URL', 'http://localhost:5001')
+    COMMENT_SERVICE_URL = os.environ.get('COMMENT_SERVICE_URL', 'http://localhost:5003')
+    ATTACHMENT_SERVICE_URL = os.environ.get('ATTACHMENT_SERVICE_URL', 'http://localhost:5004')
     ACTIVITY_LOG_SERVICE_URL = os.environ.get('ACTIVITY_LOG_SERVICE_URL', 'http://localhost:5006')
+    
+    # Redis and Celery for downstream cleanup jobs
+    REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/4')
+    CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/4')
+    CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', 'redis://localhost:6379/4')
+    CLEANUP_CHUNK_SIZE = int(os.environ.get('CLEANUP_CHUNK_SIZE', 500))  # Task ids per downstream bulk-delete call
+    CLEANUP_REQUEUE_AFTER_MINUTES = 60  # Failed cleanup chunks are re-queued once their last attempt is this old
+    
+    # Read-through cache for project/task reads (opt-in)
+    READ_CACHE_ENABLED = os.environ.get('READ_CACHE_ENABLED', 'false').lower() in ['true', '1']
+    READ_CACHE_TTL = int(os.environ.get('READ_CACHE_TTL', 300))
+    
+    # Due-date queries
+    DUE_SOON_DEFAULT_HOURS = int(os.environ.get('DUE_SOON_DEFAULT_HOURS', 48))
+    DUE_SOON_MAX_HOURS = int(os.environ.get('DUE_SOON_MAX_HOURS', 24 * 30))
+    
+    # Change feeds
+    CHANGE_FEED_SETTLE_SECONDS = int(os.environ.get('CHANGE_FEED_SETTLE_SECONDS', 2))  # Hide rows from in-flight transactions
+    TOMBSTONE_RETENTION_DAYS = int(os.environ.get('TOMBSTONE_RETENTION_DAYS', 30))
+    
+    # Archive tier
+    ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', 30))  # Days a completed/archived project stays hot
+    ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE', 100))  # Projects moved per transaction
 
 # Application setup
 app = Flask(__name__)
@@ -29,6 +61,17 @@ app.config.from_object(Config)
 db = SQLAlchemy(app)
 migrate = Migrate(app, db)
 
+# Celery setup
+celery = Celery(app.name, broker=app.config['CELERY_BROKER_URL'])
+celery.conf.update(app.config)
+
+class FlaskCeleryTask(celery.Task):
+    def __call__(self, *args, **kwargs):
+        with app.app_context():
+            return self.run(*args, **kwargs)
+
+celery.Task = FlaskCeleryTask
+
 # Logging setup
 logging.basicConfig(
     level=logging.INFO,
@@ -40,9 +83,29 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Redis connection (read cache)
+try:
+    redis_client = redis.from_url(app.config['REDIS_URL'])
+    redis_client.ping()
+    logger.info("Successfully connected to Redis")
+except redis.exceptions.ConnectionError as e:
+    logger.error(f"Redis connection failed: {e}")
+    redis_client = None
+
 # Models
+TASK_STATUSES = ('pending', 'in_progress', 'completed', 'cancelled')
+OPEN_TASK_STATUSES = ('pending', 'in_progress')  # Anything not completed or cancelled
+PRIORITY_RANK = {'critical': 0, 'high': 1, 'medium': 2, 'low': 3}
+OPEN_TASK_PREDICATE = "status IN ('pending', 'in_progress')"
+
 class Project(db.Model):
     __tablename__ = 'projects'
+    __table_args__ = (
+        db.Index('ix_projects_owner_id_id', 'owner_id', 'id'),  # Owner-scoped lookups and listings
+        db.Index('ix_projects_owner_id_updated_at_id', 'owner_id', 'updated_at', 'id'),  # Change feed
+        # Never hand out an id again once its row was deleted or archived (SQLite reuses the highest rowid otherwise)
+        {'sqlite_autoincrement': True},
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
@@ -70,11 +133,25 @@ class Project(db.Model):
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
             'owner_id': self.owner_id,
-            'task_count': self.tasks.count()
+            'task_count': db.session.query(db.func.coalesce(db.func.sum(TaskCounter.count), 0)).filter(
+                TaskCounter.scope == 'project', TaskCounter.scope_id == self.id
+            ).scalar()
         }
 
 class Task(db.Model):
     __tablename__ = 'tasks'
+    __table_args__ = (
+        db.Index('ix_tasks_project_id_status', 'project_id', 'status'),  # Project joins and status breakdowns
+        db.Index('ix_tasks_assignee_id_status_due_date', 'assignee_id', 'status', 'due_date'),  # Assignee dashboards
+        # Partial indexes holding only open tasks, ordered by due date, for overdue/due-soon scans
+        db.Index('ix_tasks_open_assignee_id_due_date', 'assignee_id', 'due_date', 'id',
+                 sqlite_where=db.text(OPEN_TASK_PREDICATE), postgresql_where=db.text(OPEN_TASK_PREDICATE)),
+        db.Index('ix_tasks_open_project_id_due_date', 'project_id', 'due_date', 'id',
+                 sqlite_where=db.text(OPEN_TASK_PREDICATE), postgresql_where=db.text(OPEN_TASK_PREDICATE)),
+        db.Index('ix_tasks_updated_at_id', 'updated_at', 'id'),  # Change feed
+        # Comments and attachments are keyed by task id, so an id must never be handed out twice
+        {'sqlite_autoincrement': True},
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -107,6 +184,161 @@ class Task(db.Model):
             'assignee_id': self.assignee_id
         }
 
+class DeletedRecord(db.Model):
+    """Tombstone left behind by a deleted project or task so change feeds can report the delete"""
+    __tablename__ = 'deleted_records'
+    __table_args__ = (
+        db.Index('ix_deleted_records_feed', 'owner_id', 'entity_type', 'deleted_at', 'entity_id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    entity_type = db.Column(db.String(20), nullable=False)  # project, task
+    entity_id = db.Column(db.Integer, nullable=False)
+    project_id = db.Column(db.Integer)
+    owner_id = db.Column(db.Integer, nullable=False)  # Owner of the project at deletion time
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    
+    def to_dict(self):
+        return {
+            'id': self.entity_id,
+            'project_id': self.project_id,
+            'deleted_at': self.deleted_at.isoformat()
+        }
+
+class FailedCleanup(db.Model):
+    """Chunk of deleted task ids whose comments/attachments could not be cleaned up yet; retried on a schedule"""
+    __tablename__ = 'failed_dependent_cleanups'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    task_ids = db.Column(db.JSON, nullable=False)
+    attempts = db.Column(db.Integer, nullable=False, default=0)  # Scheduled re-queues so far
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    queued_at = db.Column(db.DateTime, default=datetime.utcnow)  # Last time the chunk was handed to the worker
+
+class TaskCounter(db.Model):
+    """Maintained task counts per (project, status) and (assignee, status)"""
+    __tablename__ = 'task_counters'
+    __table_args__ = (
+        db.UniqueConstraint('scope', 'scope_id', 'status', name='uq_task_counters_scope_status'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    scope = db.Column(db.String(20), nullable=False)  # project, assignee
+    scope_id = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+# Archive tier: completed/archived projects and their tasks are moved here on a schedule
+# so the hot tables and their indexes only hold live work. Ids are preserved.
+ARCHIVABLE_PROJECT_STATUSES = ('completed', 'archived')
+
+class ArchivedProject(db.Model):
+    __tablename__ = 'archived_projects'
+    __table_args__ = (
+        db.Index('ix_archived_projects_owner_id_id', 'owner_id', 'id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    name = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text)
+    status = db.Column(db.String(20))
+    priority = db.Column(db.String(10))
+    start_date = db.Column(db.Date)
+    end_date = db.Column(db.Date)
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    owner_id = db.Column(db.Integer, nullable=False)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'description': self.description,
+            'status': self.status,
+            'priority': self.priority,
+            'start_date': self.start_date.isoformat() if self.start_date else None,
+            'end_date': self.end_date.isoformat() if self.end_date else None,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat(),
+            'owner_id': self.owner_id,
+            'task_count': ArchivedTask.query.filter_by(project_id=self.id).count(),
+            'archived': True,
+            'archived_at': self.archived_at.isoformat()
+        }
+
+class ArchivedTask(db.Model):
+    __tablename__ = 'archived_tasks'
+    __table_args__ = (
+        db.Index('ix_archived_tasks_project_id_id', 'project_id', 'id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    title = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text)
+    status = db.Column(db.String(20))
+    priority = db.Column(db.String(10))
+    due_date = db.Column(db.DateTime)
+    completed_at = db.Column(db.DateTime)
+    estimated_hours = db.Column(db.Float)
+    actual_hours = db.Column(db.Float)
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    project_id = db.Column(db.Integer, db.ForeignKey('archived_projects.id'), nullable=False)
+    assignee_id = db.Column(db.Integer)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'status': self.status,
+            'priority': self.priority,
+            'due_date': self.due_date.isoformat() if self.due_date else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'estimated_hours': self.estimated_hours,
+            'actual_hours': self.actual_hours,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat(),
+            'project_id': self.project_id,
+            'assignee_id': self.assignee_id,
+            'archived': True,
+            'archived_at': self.archived_at.isoformat()
+        }
+
+# Full-text search over task title/description.
+# Postgres keeps a generated tsvector column with a GIN index; SQLite keeps an
+# external-content FTS5 table in sync with triggers. Both are created with the tasks table.
+TASK_SEARCH_DDL = {
+    'postgresql': [
+        "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'B')) STORED",
+        "CREATE INDEX IF NOT EXISTS ix_tasks_search_vector ON tasks USING GIN (search_vector)",
+    ],
+    'sqlite': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5("
+        "title, description, content='tasks', content_rowid='id', tokenize='porter unicode61')",
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN "
+        "INSERT INTO tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN "
+        "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+        "VALUES ('delete', old.id, old.title, old.description); END",
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF title, description ON tasks BEGIN "
+        "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+        "VALUES ('delete', old.id, old.title, old.description); "
+        "INSERT INTO tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    ],
+}
+
+@db.event.listens_for(Task.__table__, 'after_create')
+def create_task_search_index(target, connection, **kw):
+    """Create the dialect's full-text index alongside the tasks table"""
+    for statement in TASK_SEARCH_DDL.get(connection.dialect.name, []):
+        connection.execute(db.text(statement))
+
 # Utility functions
 def verify_user_token(token: str) -> dict:
     """Verify token with User Service"""
@@ -162,6 +394,403 @@ def log_activity(user_id: int, action: str, entity_type: str, entity_id: int, de
     except Exception as e:
         logger.error(f"Failed to log activity: {e}")
 
+def open_task_filter():
+    """Open-status filter rendered with literal values so partial indexes can be matched"""
+    return Task.status.in_([db.literal_column(f"'{status}'") for status in OPEN_TASK_STATUSES])
+
+def build_due_tasks_query(user_id: int, due_before: datetime, due_after: datetime = None):
+    """Build the open-task due-date query for the request's project or assignee scope.
+
+    Returns (query, error_response). Scope is ?project_id=<id> for a project owned by the
+    caller, otherwise tasks assigned to ?assignee_id (default: the caller) in the caller's projects.
+    """
+    project_id = request.args.get('project_id', type=int)
+    if project_id is not None:
+        project = Project.query.filter_by(id=project_id, owner_id=user_id).first()
+        if not project:
+            return None, (jsonify({'error': 'Project not found'}), 404)
+        query = Task.query.filter(Task.project_id == project_id)
+    else:
+        assignee_id = request.args.get('assignee_id', user_id, type=int)
+        query = Task.query.join(Project).filter(
+            Task.assignee_id == assignee_id,
+            Project.owner_id == user_id
+        )
+    
+    query = query.filter(open_task_filter(), Task.due_date < due_before)
+    if due_after is not None:
+        query = query.filter(Task.due_date >= due_after)
+    return query, None
+
+def paginate_due_tasks(query):
+    """Keyset-paginate a due-date query on (due_date, id)"""
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+    include_total = request.args.get('include_total', 'false').lower() in ['true', '1']
+    total = query.order_by(None).count() if include_total else None
+    
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            cursor_due, cursor_id = cursor.rsplit(',', 1)
+            cursor_due, cursor_id = datetime.fromisoformat(cursor_due), int(cursor_id)
+        except ValueError:
+            return None, (jsonify({'error': 'Invalid cursor'}), 400)
+        query = query.filter(db.or_(
+            Task.due_date > cursor_due,
+            db.and_(Task.due_date == cursor_due, Task.id > cursor_id)
+        ))
+    
+    tasks = query.order_by(Task.due_date.asc(), Task.id.asc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        next_cursor = f"{tasks[-1].due_date.isoformat()},{tasks[-1].id}"
+    
+    page = {
+        'tasks': [t.to_dict() for t in tasks],
+        'next_cursor': next_cursor
+    }
+    if include_total:
+        page['total'] = total
+    return page, None
+
+def parse_change_cursor(cursor: str):
+    """Parse a change-feed cursor of the form <iso timestamp>,<id>"""
+    cursor_ts, cursor_id = cursor.rsplit(',', 1)
+    return datetime.fromisoformat(cursor_ts), int(cursor_id)
+
+def after_cursor(ts_column, id_column, cursor_ts: datetime, cursor_id: int):
+    """Keyset predicate for rows strictly after (cursor_ts, cursor_id)"""
+    return db.or_(ts_column > cursor_ts, db.and_(ts_column == cursor_ts, id_column > cursor_id))
+
+def build_change_feed(entity_type: str, live_query, model, tombstone_query):
+    """Merge changed rows and tombstones after ?since into one page ordered by (timestamp, id).
+
+    Returns (page, error_response).
+    """
+    limit = min(max(request.args.get('limit', 500, type=int), 1), 1000)
+    until = datetime.utcnow() - timedelta(seconds=app.config['CHANGE_FEED_SETTLE_SECONDS'])
+    
+    live_query = live_query.filter(model.updated_at < until)
+    tombstone_query = tombstone_query.filter(DeletedRecord.deleted_at < until)
+    
+    since = request.args.get('since')
+    if since:
+        try:
+            since_ts, since_id = parse_change_cursor(since)
+        except ValueError:
+            return None, (jsonify({'error': 'Invalid cursor'}), 400)
+        
+        retention_start = datetime.utcnow() - timedelta(days=app.config['TOMBSTONE_RETENTION_DAYS'])
+        if since_ts < retention_start:
+            return None, (jsonify({'error': 'Cursor has expired, a full resync is required'}), 410)
+        
+        live_query = live_query.filter(after_cursor(model.updated_at, model.id, since_ts, since_id))
+        tombstone_query = tombstone_query.filter(
+            after_cursor(DeletedRecord.deleted_at, DeletedRecord.entity_id, since_ts, since_id)
+        )
+    
+    # Each source is already ordered, so fetching limit + 1 from both bounds the merge
+    rows = live_query.order_by(model.updated_at.asc(), model.id.asc()).limit(limit + 1).all()
+    tombstones = tombstone_query.order_by(
+        DeletedRecord.deleted_at.asc(), DeletedRecord.entity_id.asc()
+    ).limit(limit + 1).all()
+    
+    changes = [(row.updated_at, row.id, 'upsert', row) for row in rows]
+    changes += [(t.deleted_at, t.entity_id, 'delete', t) for t in tombstones]
+    changes.sort(key=lambda change: (change[0], change[1]))
+    
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    
+    if changes:
+        last_ts, last_id = changes[-1][0], changes[-1][1]
+        next_cursor = f"{last_ts.isoformat()},{last_id}"
+    elif since and since_ts >= until:
+        next_cursor = since
+    else:
+        # Nothing settled after the cursor: move it up to the settle horizon so idle consumers do not expire
+        next_cursor = f"{until.isoformat()},0"
+
+    return {
+        'changes': [
+            {'type': change_type, entity_type: record.to_dict()}
+            for _, _, change_type, record in changes
+        ],
+        'next_cursor': next_cursor,
+        'has_more': has_more
+    }, None
+
+def search_task_ids(user_id: int, terms: list, project_id: int, limit: int, offset: int) -> list:
+    """Return [(task_id, rank)] for the caller's tasks matching all terms, best match first"""
+    params = {'user_id': user_id, 'project_id': project_id, 'limit': limit, 'offset': offset}
+    project_filter = "AND tasks.project_id = :project_id" if project_id is not None else ""
+    
+    if db.engine.dialect.name == 'postgresql':
+        params['query'] = ' & '.join(terms)
+        sql = f"""
+            SELECT tasks.id, ts_rank(tasks.search_vector, query) AS rank
+            FROM tasks JOIN projects ON projects.id = tasks.project_id,
+                 to_tsquery('english', :query) AS query
+            WHERE tasks.search_vector @@ query AND projects.owner_id = :user_id {project_filter}
+            ORDER BY rank DESC, tasks.id
+            LIMIT :limit OFFSET :offset
+        """
+    else:
+        # Quote every term so user input cannot inject FTS5 syntax
+        params['query'] = ' '.join(f'"{term}"' for term in terms)
+        sql = f"""
+            SELECT tasks.id, -bm25(tasks_fts, 2.0, 1.0) AS rank
+            FROM tasks_fts JOIN tasks ON tasks.id = tasks_fts.rowid
+                 JOIN projects ON projects.id = tasks.project_id
+            WHERE tasks_fts MATCH :query AND projects.owner_id = :user_id {project_filter}
+            ORDER BY bm25(tasks_fts, 2.0, 1.0), tasks.id
+            LIMIT :limit OFFSET :offset
+        """
+    
+    return [(row[0], row[1]) for row in db.session.execute(db.text(sql), params)]
+
+# Read-through cache.
+# Entries are keyed by project generation, so bumping the generation after a write
+# orphans every cached read of that project in O(1); orphans expire via READ_CACHE_TTL.
+def read_cache_enabled() -> bool:
+    return redis_client is not None and app.config['READ_CACHE_ENABLED']
+
+def generation_ttl() -> int:
+    """Generation counters outlive the entries keyed by them and expire once a project goes quiet"""
+    return 2 * app.config['READ_CACHE_TTL']
+
+def project_generation(project_id: int):
+    """Current cache generation of a project, or None when the cache is unavailable"""
+    if not read_cache_enabled():
+        return None
+    try:
+        key = f"pts:project:{project_id}:gen"
+        # Seed missing counters from the clock so an expired or evicted counter never reissues an old generation
+        pipe = redis_client.pipeline()
+        pipe.set(key, time.time_ns(), nx=True, ex=generation_ttl())
+        pipe.expire(key, generation_ttl())
+        pipe.get(key)
+        return int(pipe.execute()[-1])
+    except Exception as e:
+        logger.warning(f"Read cache unavailable: {e}")
+        return None
+
+def bump_project_generation(project_id: int):
+    """Invalidate all cached reads of a project; call after the write has committed"""
+    if not read_cache_enabled():
+        return
+    try:
+        key = f"pts:project:{project_id}:gen"
+        pipe = redis_client.pipeline()
+        pipe.set(key, time.time_ns(), nx=True)
+        pipe.incr(key)
+        pipe.expire(key, generation_ttl())
+        pipe.execute()
+    except Exception as e:
+        logger.error(f"Failed to bump cache generation for project {project_id}: {e}")
+
+def cached_read(project_id: int, user_id: int, name: str, loader):
+    """Serve loader() through the cache; loader returns a JSON-able payload or None"""
+    generation = project_generation(project_id)
+    key = f"pts:project:{project_id}:{generation}:user:{user_id}:{name}"
+    
+    if generation is not None:
+        try:
+            cached = redis_client.get(key)
+            if cached is not None:
+                return json.loads(cached)
+        except Exception as e:
+            logger.warning(f"Read cache get failed: {e}")
+    
+    # The generation was read before loading, so a concurrent write leaves this entry orphaned
+    payload = loader()
+    
+    if generation is not None and payload is not None:
+        try:
+            redis_client.setex(key, app.config['READ_CACHE_TTL'], json.dumps(payload))
+        except Exception as e:
+            logger.warning(f"Read cache set failed: {e}")
+    return payload
+
+def cached_task_project_id(task_id: int):
+    """Project id of a task from the cache (tasks never move between projects)"""
+    if not read_cache_enabled():
+        return None
+    try:
+        project_id = redis_client.get(f"pts:task:{task_id}:project")
+        return int(project_id) if project_id is not None else None
+    except Exception as e:
+        logger.warning(f"Read cache get failed: {e}")
+        return None
+
+def remember_task_project_id(task_id: int, project_id: int):
+    if not read_cache_enabled():
+        return
+    try:
+        redis_client.setex(f"pts:task:{task_id}:project", app.config['READ_CACHE_TTL'], project_id)
+    except Exception as e:
+        logger.warning(f"Read cache set failed: {e}")
+
+def load_owned_task(task_id: int, user_id: int):
+    """Load a task owned by user_id, through the cache when its project is known"""
+    def loader():
+        task = Task.query.join(Project).filter(
+            Task.id == task_id,
+            Project.owner_id == user_id
+        ).first()
+        return task.to_dict() if task else None
+    
+    project_id = cached_task_project_id(task_id)
+    if project_id is None:
+        # Generation unknown before the read, so populate only the task -> project mapping
+        task_dict = loader()
+        if task_dict:
+            remember_task_project_id(task_id, task_dict['project_id'])
+        return task_dict
+    
+    return cached_read(project_id, user_id, f"task:{task_id}", loader)
+
+def load_owned_archived_task(task_id: int, user_id: int):
+    task = ArchivedTask.query.join(ArchivedProject).filter(
+        ArchivedTask.id == task_id,
+        ArchivedProject.owner_id == user_id
+    ).first()
+    return task.to_dict() if task else None
+
+def task_counter_deltas(task_rows, sign: int) -> dict:
+    """Counter deltas for (project_id, assignee_id, status) rows being added (+1) or removed (-1)"""
+    deltas = {}
+    for project_id, assignee_id, status in task_rows:
+        deltas[('project', project_id, status)] = deltas.get(('project', project_id, status), 0) + sign
+        if assignee_id is not None:
+            deltas[('assignee', assignee_id, status)] = deltas.get(('assignee', assignee_id, status), 0) + sign
+    return deltas
+
+def apply_task_counter_deltas(deltas: dict):
+    """Atomically add deltas to task counters within the current transaction"""
+    dialect_insert = postgresql.insert if db.engine.dialect.name == 'postgresql' else sqlite.insert
+    for (scope, scope_id, status), delta in deltas.items():
+        if not delta:
+            continue
+        statement = dialect_insert(TaskCounter).values(scope=scope, scope_id=scope_id, status=status, count=delta)
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=['scope', 'scope_id', 'status'],
+            set_={'count': TaskCounter.count + statement.excluded.count}
+        ))
+
+def read_task_counts(scope: str, scope_id: int) -> dict:
+    """Per-status task counts for a scope, read from the counter table"""
+    counts = {status: 0 for status in TASK_STATUSES}
+    for status, count in db.session.query(TaskCounter.status, TaskCounter.count).filter_by(scope=scope, scope_id=scope_id):
+        counts[status] = count
+    return counts
+
+def include_archived() -> bool:
+    return request.args.get('include_archived', 'false').lower() in ['true', '1']
+
+def copy_rows(source, target, where, **extra):
+    """INSERT ... SELECT the rows of `source` matching `where` into `target`, over their shared columns"""
+    columns = [column.name for column in target.__table__.columns if column.name in source.__table__.c]
+    values = [source.__table__.c[name] for name in columns] + [db.literal(value) for value in extra.values()]
+    return db.insert(target).from_select(columns + list(extra), db.select(*values).where(where))
+
+def archive_projects_batch(project_ids: list, cutoff: datetime = None) -> int:
+    """Move projects and their tasks into the archive tables in one transaction; returns tasks moved
+    
+    Projects are re-checked (still archivable, untouched since cutoff) once locked, and skipped otherwise.
+    """
+    archived_at = datetime.utcnow()
+    
+    # Lock the projects first: task writes take a share lock on their project (and task inserts its FK key
+    # share lock), so no task can join, leave or change under these projects until this transaction ends
+    locked = Project.query.filter(
+        Project.id.in_(project_ids),
+        Project.status.in_(ARCHIVABLE_PROJECT_STATUSES)
+    )
+    if cutoff is not None:
+        locked = locked.filter(Project.updated_at < cutoff)
+    project_ids = [project_id for (project_id,) in locked.with_entities(Project.id).order_by(Project.id).with_for_update()]
+    if not project_ids:
+        db.session.commit()
+        return 0
+    db.session.query(Task.id).filter(Task.project_id.in_(project_ids)).order_by(Task.id).with_for_update().all()
+    
+    # Archived tasks drop out of the counters, which only track the hot set
+    assignee_counts = db.session.query(Task.assignee_id, Task.status, db.func.count()).filter(
+        Task.project_id.in_(project_ids), Task.assignee_id.isnot(None)
+    ).group_by(Task.assignee_id, Task.status).all()
+    apply_task_counter_deltas({
+        ('assignee', assignee_id, status): -count for assignee_id, status, count in assignee_counts
+    })
+    TaskCounter.query.filter(
+        TaskCounter.scope == 'project', TaskCounter.scope_id.in_(project_ids)
+    ).delete(synchronize_session=False)
+    
+    # To change-feed consumers the rows leave the hot tables like a delete (a restore brings them back as upserts)
+    db.session.execute(db.insert(DeletedRecord).from_select(
+        ['entity_type', 'entity_id', 'project_id', 'owner_id', 'deleted_at'],
+        db.select(
+            db.literal('task'), Task.id, Task.project_id, Project.owner_id, db.literal(archived_at)
+        ).join(Project, Project.id == Task.project_id).where(Task.project_id.in_(project_ids))
+    ))
+    db.session.execute(db.insert(DeletedRecord).from_select(
+        ['entity_type', 'entity_id', 'project_id', 'owner_id', 'deleted_at'],
+        db.select(
+            db.literal('project'), Project.id, db.null(), Project.owner_id, db.literal(archived_at)
+        ).where(Project.id.in_(project_ids))
+    ))
+    
+    db.session.execute(copy_rows(Project, ArchivedProject, Project.id.in_(project_ids), archived_at=archived_at))
+    task_count = db.session.execute(
+        copy_rows(Task, ArchivedTask, Task.project_id.in_(project_ids), archived_at=archived_at)
+    ).rowcount
+    # Only rows that now have an archived copy leave the hot tables
+    Task.query.filter(Task.id.in_(
+        db.select(ArchivedTask.id).where(
+            ArchivedTask.project_id.in_(project_ids), ArchivedTask.archived_at == archived_at
+        )
+    )).delete(synchronize_session=False)
+    Project.query.filter(Project.id.in_(
+        db.select(ArchivedProject.id).where(
+            ArchivedProject.id.in_(project_ids), ArchivedProject.archived_at == archived_at
+        )
+    )).delete(synchronize_session=False)
+    db.session.commit()
+    
+    for project_id in project_ids:
+        bump_project_generation(project_id)
+    return task_count
+
+def restore_archived_project(project_id: int) -> bool:
+    """Move an archived project and its tasks back into the hot tables
+    
+    Returns False, changing nothing, when a live project or task already holds one of the archived ids.
+    """
+    if db.session.get(Project, project_id) or db.session.query(Task.id).filter(
+        Task.id.in_(db.select(ArchivedTask.id).where(ArchivedTask.project_id == project_id))
+    ).first():
+        return False
+    
+    task_rows = db.session.query(ArchivedTask.project_id, ArchivedTask.assignee_id, ArchivedTask.status).filter(
+        ArchivedTask.project_id == project_id
+    ).all()
+    
+    db.session.execute(copy_rows(ArchivedProject, Project, ArchivedProject.id == project_id))
+    db.session.execute(copy_rows(ArchivedTask, Task, ArchivedTask.project_id == project_id))
+    apply_task_counter_deltas(task_counter_deltas(task_rows, +1))
+    
+    # Restoring counts as a change: it resurfaces the rows in change feeds and restarts the archive clock
+    restored_at = datetime.utcnow()
+    Project.query.filter_by(id=project_id).update({'updated_at': restored_at}, synchronize_session=False)
+    Task.query.filter_by(project_id=project_id).update({'updated_at': restored_at}, synchronize_session=False)
+    
+    ArchivedTask.query.filter_by(project_id=project_id).delete(synchronize_session=False)
+    ArchivedProject.query.filter_by(id=project_id).delete(synchronize_session=False)
+    db.session.commit()
+    bump_project_generation(project_id)
+    return True
+
 # Authentication decorator
 def token_required(f):
     @wraps(f)
@@ -182,17 +811,188 @@ def token_required(f):
         return f(*args, **kwargs)
     return decorated
 
+# Celery Tasks
+def record_failed_cleanup(task_ids: list, error: str, cleanup_id: int = None):
+    """Persist a cleanup chunk that ran out of retries so retry_failed_cleanups picks it up again"""
+    try:
+        failed = db.session.get(FailedCleanup, cleanup_id) if cleanup_id else None
+        if failed is None:
+            failed = FailedCleanup(task_ids=task_ids)
+            db.session.add(failed)
+        failed.last_error = error[:1000]
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to record failed cleanup for tasks {task_ids[:10]}...: {e}")
+
+@celery.task(bind=True, max_retries=5)
+def cleanup_task_dependents(self, task_ids: list, cleanup_id: int = None):
+    """Delete comments and attachments of deleted tasks (idempotent, safe to retry)
+    
+    cleanup_id is set when the chunk is a re-queued FailedCleanup, which is removed once it succeeds.
+    """
+    try:
+        for service_url, endpoint in [
+            (app.config['COMMENT_SERVICE_URL'], '/api/comments/bulk-delete'),
+            (app.config['ATTACHMENT_SERVICE_URL'], '/api/attachments/bulk-delete'),
+        ]:
+            response = requests.post(f"{service_url}{endpoint}", json={'task_ids': task_ids}, timeout=30)
+            if response.status_code >= 300:
+                raise RuntimeError(f"{endpoint} returned {response.status_code}")
+        
+        if cleanup_id:
+            FailedCleanup.query.filter_by(id=cleanup_id).delete(synchronize_session=False)
+            db.session.commit()
+        
+        logger.info(f"Cleaned up comments and attachments for {len(task_ids)} deleted tasks")
+        return {'status': 'success', 'task_count': len(task_ids)}
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to clean up dependents for tasks {task_ids[:10]}...: {e}")
+        
+        # Retry with exponential backoff
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=e, countdown=30 * 2 ** self.request.retries)
+        
+        record_failed_cleanup(task_ids, str(e), cleanup_id)
+        return {'status': 'error', 'message': str(e)}
+
+def enqueue_dependent_cleanup(task_ids: list):
+    """Queue chunked downstream cleanup for deleted task ids"""
+    chunk_size = app.config['CLEANUP_CHUNK_SIZE']
+    for start in range(0, len(task_ids), chunk_size):
+        chunk = task_ids[start:start + chunk_size]
+        try:
+            cleanup_task_dependents.delay(chunk)
+        except Exception as e:
+            logger.error(f"Failed to queue dependent cleanup for {len(chunk)} tasks: {e}")
+            record_failed_cleanup(chunk, f"Not queued: {e}")
+
+@celery.task
+def retry_failed_cleanups():
+    """Re-queue cleanup chunks that ran out of retries (or were never queued)"""
+    try:
+        cutoff = datetime.utcnow() - timedelta(minutes=app.config['CLEANUP_REQUEUE_AFTER_MINUTES'])
+        # Chunks queued more recently may still be working through their own retries
+        pending = FailedCleanup.query.filter(FailedCleanup.queued_at < cutoff).order_by(FailedCleanup.id).all()
+        
+        requeued = 0
+        for failed in pending:
+            cleanup_task_dependents.delay(failed.task_ids, cleanup_id=failed.id)
+            failed.attempts += 1
+            failed.queued_at = datetime.utcnow()
+            requeued += 1
+        db.session.commit()
+        
+        logger.info(f"Re-queued {requeued} failed dependent cleanups")
+        return {'status': 'success', 'requeued': requeued}
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to re-queue dependent cleanups: {e}")
+        return {'status': 'error', 'message': str(e)}
+
+@celery.task
+def reconcile_task_counters():
+    """Recompute task counters from the tasks table and repair any drift"""
+    try:
+        if db.engine.dialect.name == 'postgresql':
+            # Task writes adjust counters in the same transaction; holding them back until the repaired values
+            # commit keeps the snapshot below and the absolute counts written from it consistent
+            db.session.execute(db.text('LOCK TABLE task_counters IN SHARE ROW EXCLUSIVE MODE'))
+        actual = {}
+        for project_id, assignee_id, status, count in db.session.query(
+            Task.project_id, Task.assignee_id, Task.status, db.func.count()
+        ).group_by(Task.project_id, Task.assignee_id, Task.status):
+            actual[('project', project_id, status)] = actual.get(('project', project_id, status), 0) + count
+            if assignee_id is not None:
+                actual[('assignee', assignee_id, status)] = actual.get(('assignee', assignee_id, status), 0) + count
+        
+        repaired = 0
+        for counter in TaskCounter.query.all():
+            key = (counter.scope, counter.scope_id, counter.status)
+            expected = actual.pop(key, 0)
+            if counter.count != expected:
+                counter.count = expected
+                repaired += 1
+        
+        for (scope, scope_id, status), count in actual.items():
+            db.session.add(TaskCounter(scope=scope, scope_id=scope_id, status=status, count=count))
+            repaired += 1
+        
+        TaskCounter.query.filter(TaskCounter.count == 0).delete(synchronize_session=False)
+        db.session.commit()
+        
+        logger.info(f"Reconciled task counters, repaired {repaired} entries")
+        return {'status': 'success', 'repaired': repaired}
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to reconcile task counters: {e}")
+        return {'status': 'error', 'message': str(e)}
+
+@celery.task
+def archive_inactive_projects():
+    """Move completed/archived projects untouched for ARCHIVE_AFTER_DAYS into the archive tables"""
+    try:
+        cutoff = datetime.utcnow() - timedelta(days=app.config['ARCHIVE_AFTER_DAYS'])
+        project_count = 0
+        task_count = 0
+        
+        while True:
+            project_ids = [project_id for (project_id,) in db.session.query(Project.id).filter(
+                Project.status.in_(ARCHIVABLE_PROJECT_STATUSES),
+                Project.updated_at < cutoff
+            ).order_by(Project.id).limit(app.config['ARCHIVE_BATCH_SIZE'])]
+            if not project_ids:
+                break
+            
+            task_count += archive_projects_batch(project_ids, cutoff)
+            project_count += len(project_ids)
+        
+        logger.info(f"Archived {project_count} projects with {task_count} tasks")
+        return {'status': 'success', 'projects': project_count, 'tasks': task_count}
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to archive projects: {e}")
+        return {'status': 'error', 'message': str(e)}
+
+# Scheduled background tasks (configured at import time so `celery beat` picks them up;
+# old-style setting names because the Flask config passes CELERY_* keys)
+celery.conf.update(
+    CELERYBEAT_SCHEDULE={
+        'reconcile-task-counters': {
+            'task': 'project_task_service.reconcile_task_counters',
+            'schedule': crontab(hour=3, minute=0),  # Daily at 3 AM
+        },
+        'archive-inactive-projects': {
+            'task': 'project_task_service.archive_inactive_projects',
+            'schedule': crontab(hour=2, minute=0),  # Daily at 2 AM, before counters are reconciled
+        },
+        'retry-failed-cleanups': {
+            'task': 'project_task_service.retry_failed_cleanups',
+            'schedule': crontab(minute=15),  # Hourly
+        },
+    },
+    CELERY_TIMEZONE='UTC'
+)
+
 # Project Routes
 @app.route('/api/projects', methods=['GET'])
 @token_required
 def get_projects():
-    """Get all projects for current user"""
+    """Get all projects for current user (?include_archived=true adds the archive tier)"""
     try:
         user_id = request.current_user['id']
-        projects = Project.query.filter_by(owner_id=user_id).all()
+        projects = [p.to_dict() for p in Project.query.filter_by(owner_id=user_id).all()]
+        
+        if include_archived():
+            projects.extend(p.to_dict() for p in ArchivedProject.query.filter_by(owner_id=user_id).all())
         
         return jsonify({
-            'projects': [p.to_dict() for p in projects]
+            'projects': projects
         })
         
     except Exception as e:
@@ -256,18 +1056,48 @@ def create_project():
         logger.error(f"Failed to create project: {e}")
         return jsonify({'error': 'Failed to create project'}), 500
 
+@app.route('/api/projects/changes', methods=['GET'])
+@token_required
+def get_project_changes():
+    """Get projects created, updated or deleted after the ?since cursor"""
+    try:
+        user_id = request.current_user['id']
+        
+        page, error = build_change_feed(
+            'project',
+            Project.query.filter(Project.owner_id == user_id),
+            Project,
+            DeletedRecord.query.filter_by(owner_id=user_id, entity_type='project')
+        )
+        if error:
+            return error
+        
+        return jsonify(page)
+        
+    except Exception as e:
+        logger.error(f"Failed to get project changes: {e}")
+        return jsonify({'error': 'Failed to retrieve project changes'}), 500
+
 @app.route('/api/projects/<int:project_id>', methods=['GET'])
 @token_required
 def get_project(project_id):
     """Get a specific project"""
     try:
         user_id = request.current_user['id']
-        project = Project.query.filter_by(id=project_id, owner_id=user_id).first()
         
-        if not project:
+        def loader():
+            project = Project.query.filter_by(id=project_id, owner_id=user_id).first()
+            return project.to_dict() if project else None
+        
+        project_dict = cached_read(project_id, user_id, 'project', loader)
+        if not project_dict and include_archived():
+            archived_project = ArchivedProject.query.filter_by(id=project_id, owner_id=user_id).first()
+            project_dict = archived_project.to_dict() if archived_project else None
+        
+        if not project_dict:
             return jsonify({'error': 'Project not found'}), 404
         
-        return jsonify({'project': project.to_dict()})
+        return jsonify({'project': project_dict})
         
     except Exception as e:
         logger.error(f"Failed to get project {project_id}: {e}")
@@ -320,6 +1150,7 @@ def update_project(project_id):
         
         project.updated_at = datetime.utcnow()
         db.session.commit()
+        bump_project_generation(project.id)
         
         log_activity(user_id, 'update', 'project', project.id, data)
         
@@ -339,16 +1170,43 @@ def delete_project(project_id):
     """Delete a project"""
     try:
         user_id = request.current_user['id']
-        project = Project.query.filter_by(id=project_id, owner_id=user_id).first()
+        project_name = db.session.query(Project.name).filter_by(id=project_id, owner_id=user_id).scalar()
         
-        if not project:
+        if project_name is None:
             return jsonify({'error': 'Project not found'}), 404
         
-        project_name = project.name
-        db.session.delete(project)
+        task_ids = [task_id for (task_id,) in db.session.query(Task.id).filter_by(project_id=project_id)]
+        deleted_at = datetime.utcnow()
+        
+        # Tombstones for the change feeds, written set-based in the same transaction
+        db.session.execute(db.insert(DeletedRecord).from_select(
+            ['entity_type', 'entity_id', 'project_id', 'owner_id', 'deleted_at'],
+            db.select(
+                db.literal('task'), Task.id, Task.project_id, db.literal(user_id), db.literal(deleted_at)
+            ).where(Task.project_id == project_id)
+        ))
+        db.session.add(DeletedRecord(
+            entity_type='project', entity_id=project_id, owner_id=user_id, deleted_at=deleted_at
+        ))
+        
+        # Assignee counters lose this project's tasks; the project's own counters go away
+        assignee_counts = db.session.query(Task.assignee_id, Task.status, db.func.count()).filter(
+            Task.project_id == project_id, Task.assignee_id.isnot(None)
+        ).group_by(Task.assignee_id, Task.status).all()
+        apply_task_counter_deltas({
+            ('assignee', assignee_id, status): -count for assignee_id, status, count in assignee_counts
+        })
+        TaskCounter.query.filter_by(scope='project', scope_id=project_id).delete(synchronize_session=False)
+        
+        # Set-based deletes instead of loading every task through the ORM cascade
+        Task.query.filter_by(project_id=project_id).delete(synchronize_session=False)
+        Project.query.filter_by(id=project_id).delete(synchronize_session=False)
         db.session.commit()
+        bump_project_generation(project_id)
+        
+        enqueue_dependent_cleanup(task_ids)
         
-        log_activity(user_id, 'delete', 'project', project_id, {'name': project_name})
+        log_activity(user_id, 'delete', 'project', project_id, {'name': project_name, 'task_count': len(task_ids)})
         
         return jsonify({'message': 'Project deleted successfully'})
         
@@ -357,6 +1215,57 @@ def delete_project(project_id):
         logger.error(f"Failed to delete project {project_id}: {e}")
         return jsonify({'error': 'Failed to delete project'}), 500
 
+@app.route('/api/projects/<int:project_id>/archive', methods=['POST'])
+@token_required
+def archive_project(project_id):
+    """Move a completed or archived project and its tasks into the archive tier now"""
+    try:
+        user_id = request.current_user['id']
+        project = Project.query.filter_by(id=project_id, owner_id=user_id).first()
+        
+        if not project:
+            return jsonify({'error': 'Project not found'}), 404
+        
+        if project.status not in ARCHIVABLE_PROJECT_STATUSES:
+            return jsonify({'error': f'Only projects with status in {list(ARCHIVABLE_PROJECT_STATUSES)} can be archived'}), 400
+        
+        task_count = archive_projects_batch([project_id])
+        
+        log_activity(user_id, 'archive', 'project', project_id, {'task_count': task_count})
+        
+        return jsonify({'message': 'Project archived successfully', 'task_count': task_count})
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to archive project {project_id}: {e}")
+        return jsonify({'error': 'Failed to archive project'}), 500
+
+@app.route('/api/projects/<int:project_id>/restore', methods=['POST'])
+@token_required
+def restore_project(project_id):
+    """Move an archived project and its tasks back into the hot tables so they can be edited"""
+    try:
+        user_id = request.current_user['id']
+        if not ArchivedProject.query.filter_by(id=project_id, owner_id=user_id).first():
+            return jsonify({'error': 'Archived project not found'}), 404
+        
+        if not restore_archived_project(project_id):
+            logger.error(f"Cannot restore project {project_id}: its id or a task id is taken by a live row")
+            return jsonify({'error': 'Project or task ids are already in use; project cannot be restored'}), 409
+        project = Project.query.get(project_id)
+        
+        log_activity(user_id, 'restore', 'project', project_id, {'name': project.name})
+        
+        return jsonify({
+            'message': 'Project restored successfully',
+            'project': project.to_dict()
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to restore project {project_id}: {e}")
+        return jsonify({'error': 'Failed to restore project'}), 500
+
 # Task Routes
 @app.route('/api/projects/<int:project_id>/tasks', methods=['GET'])
 @token_required
@@ -364,18 +1273,95 @@ def get_tasks(project_id):
     """Get all tasks for a project"""
     try:
         user_id = request.current_user['id']
-        project = Project.query.filter_by(id=project_id, owner_id=user_id).first()
         
-        if not project:
+        def loader():
+            project = Project.query.filter_by(id=project_id, owner_id=user_id).first()
+            return [t.to_dict() for t in project.tasks.all()] if project else None
+        
+        tasks = cached_read(project_id, user_id, 'tasks', loader)
+        if tasks is None and include_archived():
+            if ArchivedProject.query.filter_by(id=project_id, owner_id=user_id).first():
+                tasks = [t.to_dict() for t in ArchivedTask.query.filter_by(project_id=project_id).all()]
+        
+        if tasks is None:
             return jsonify({'error': 'Project not found'}), 404
         
-        tasks = project.tasks.all()
-        return jsonify({'tasks': [t.to_dict() for t in tasks]})
+        return jsonify({'tasks': tasks})
         
     except Exception as e:
         logger.error(f"Failed to get tasks for project {project_id}: {e}")
         return jsonify({'error': 'Failed to retrieve tasks'}), 500
 
+@app.route('/api/projects/<int:project_id>/board', methods=['GET'])
+@token_required
+def get_project_board(project_id):
+    """Get a kanban board: per-status counts and the top ?limit tasks of each column"""
+    try:
+        user_id = request.current_user['id']
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+        
+        def loader():
+            if not Project.query.filter_by(id=project_id, owner_id=user_id).first():
+                return None
+            
+            # Rank cards within each status column, then keep only the first `limit` per column; the
+            # column total rides along on every row, so one query serves the whole board
+            position = db.func.row_number().over(
+                partition_by=Task.status,
+                order_by=[
+                    db.case(PRIORITY_RANK, value=Task.priority, else_=len(PRIORITY_RANK)),
+                    Task.due_date.is_(None),
+                    Task.due_date,
+                    Task.id
+                ]
+            ).label('position')
+            column_count = db.func.count().over(partition_by=Task.status).label('column_count')
+            ranked = db.select(Task, position, column_count).where(Task.project_id == project_id).subquery()
+            card = db.aliased(Task, ranked)
+            rows = db.session.execute(
+                db.select(card, ranked.c.column_count)
+                .where(ranked.c.position <= limit)
+                .order_by(ranked.c.status, ranked.c.position)
+            ).all()
+            
+            columns = {status: {'status': status, 'count': 0, 'tasks': []} for status in TASK_STATUSES}
+            for task, count in rows:
+                if task.status in columns:
+                    columns[task.status]['count'] = count
+                    columns[task.status]['tasks'].append(task.to_dict())
+            
+            return {
+                'project_id': project_id,
+                'limit': limit,
+                'columns': list(columns.values())
+            }
+        
+        board = cached_read(project_id, user_id, f'board:{limit}', loader)
+        if board is None:
+            return jsonify({'error': 'Project not found'}), 404
+        
+        return jsonify(board)
+        
+    except Exception as e:
+        logger.error(f"Failed to get board for project {project_id}: {e}")
+        return jsonify({'error': 'Failed to retrieve project board'}), 500
+
+@app.route('/api/projects/<int:project_id>/task-counts', methods=['GET'])
+@token_required
+def get_project_task_counts(project_id):
+    """Get per-status task counts for a project from the maintained counters"""
+    try:
+        user_id = request.current_user['id']
+        if not db.session.query(Project.id).filter_by(id=project_id, owner_id=user_id).first():
+            return jsonify({'error': 'Project not found'}), 404
+        
+        counts = read_task_counts('project', project_id)
+        return jsonify({'project_id': project_id, 'counts': counts, 'total': sum(counts.values())})
+        
+    except Exception as e:
+        logger.error(f"Failed to get task counts for project {project_id}: {e}")
+        return jsonify({'error': 'Failed to retrieve task counts'}), 500
+
 @app.route('/api/projects/<int:project_id>/tasks', methods=['POST'])
 @token_required
 def create_task(project_id):
@@ -386,7 +1372,8 @@ def create_task(project_id):
             return jsonify({'error': 'Invalid JSON payload'}), 400
         
         user_id = request.current_user['id']
-        project = Project.query.filter_by(id=project_id, owner_id=user_id).first()
+        # Share lock: the archiver locks the project before moving its tasks, so a new task never slips past it
+        project = Project.query.filter_by(id=project_id, owner_id=user_id).with_for_update(read=True).first()
         
         if not project:
             return jsonify({'error': 'Project not found'}), 404
@@ -428,7 +1415,9 @@ def create_task(project_id):
             return jsonify({'error': f'Invalid priority. Must be one of {allowed_priorities}'}), 400
         
         db.session.add(task)
+        apply_task_counter_deltas(task_counter_deltas([(project_id, task.assignee_id, task.status)], +1))
         db.session.commit()
+        bump_project_generation(project_id)
         
         log_activity(user_id, 'create', 'task', task.id, {'title': task.title, 'project_id': project_id})
         
@@ -442,21 +1431,158 @@ def create_task(project_id):
         logger.error(f"Failed to create task: {e}")
         return jsonify({'error': 'Failed to create task'}), 500
 
+@app.route('/api/tasks/changes', methods=['GET'])
+@token_required
+def get_task_changes():
+    """Get tasks created, updated or deleted after the ?since cursor, optionally for one ?project_id"""
+    try:
+        user_id = request.current_user['id']
+        
+        live_query = Task.query.join(Project).filter(Project.owner_id == user_id)
+        tombstone_query = DeletedRecord.query.filter_by(owner_id=user_id, entity_type='task')
+        
+        project_id = request.args.get('project_id', type=int)
+        if project_id is not None:
+            live_query = live_query.filter(Task.project_id == project_id)
+            tombstone_query = tombstone_query.filter(DeletedRecord.project_id == project_id)
+        
+        page, error = build_change_feed('task', live_query, Task, tombstone_query)
+        if error:
+            return error
+        
+        return jsonify(page)
+        
+    except Exception as e:
+        logger.error(f"Failed to get task changes: {e}")
+        return jsonify({'error': 'Failed to retrieve task changes'}), 500
+
+@app.route('/api/tasks/search', methods=['GET'])
+@token_required
+def search_tasks():
+    """Full-text search over title and description of the caller's tasks"""
+    try:
+        user_id = request.current_user['id']
+        
+        terms = re.findall(r'\w+', request.args.get('q', ''))[:10]
+        if not terms:
+            return jsonify({'error': 'Search query is required'}), 400
+        
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+        project_id = request.args.get('project_id', type=int)
+        
+        # Fetch one extra row to know whether another page exists without counting all matches
+        matches = search_task_ids(user_id, terms, project_id, per_page + 1, (page - 1) * per_page)
+        has_next = len(matches) > per_page
+        matches = matches[:per_page]
+        
+        tasks = {t.id: t for t in Task.query.filter(Task.id.in_([task_id for task_id, _ in matches])).all()} if matches else {}
+        results = []
+        for task_id, rank in matches:
+            if task_id in tasks:
+                task_dict = tasks[task_id].to_dict()
+                task_dict['rank'] = float(rank)
+                results.append(task_dict)
+        
+        return jsonify({
+            'tasks': results,
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'has_next': has_next
+            }
+        })
+        
+    except Exception as e:
+        logger.error(f"Failed to search tasks: {e}")
+        return jsonify({'error': 'Failed to search tasks'}), 500
+
+@app.route('/api/tasks/assigned/counts', methods=['GET'])
+@token_required
+def get_assigned_task_counts():
+    """Get per-status counts of tasks assigned to the current user from the maintained counters"""
+    try:
+        user_id = request.current_user['id']
+        counts = read_task_counts('assignee', user_id)
+        return jsonify({'assignee_id': user_id, 'counts': counts, 'total': sum(counts.values())})
+        
+    except Exception as e:
+        logger.error(f"Failed to get assigned task counts: {e}")
+        return jsonify({'error': 'Failed to retrieve task counts'}), 500
+
+@app.route('/api/tasks/overdue', methods=['GET'])
+@token_required
+def get_overdue_tasks():
+    """Get open tasks past their due date, oldest first.
+
+    Optional ?window_hours limits results to tasks that became overdue within that window.
+    """
+    try:
+        user_id = request.current_user['id']
+        now = datetime.utcnow()
+        
+        window_hours = request.args.get('window_hours', type=int)
+        if window_hours is not None and window_hours <= 0:
+            return jsonify({'error': 'window_hours must be positive'}), 400
+        due_after = now - timedelta(hours=window_hours) if window_hours else None
+        
+        query, error = build_due_tasks_query(user_id, now, due_after)
+        if error:
+            return error
+        
+        page, error = paginate_due_tasks(query)
+        if error:
+            return error
+        
+        page['as_of'] = now.isoformat()
+        return jsonify(page)
+        
+    except Exception as e:
+        logger.error(f"Failed to get overdue tasks: {e}")
+        return jsonify({'error': 'Failed to retrieve overdue tasks'}), 500
+
+@app.route('/api/tasks/due-soon', methods=['GET'])
+@token_required
+def get_due_soon_tasks():
+    """Get open tasks due within the next ?window_hours, soonest first"""
+    try:
+        user_id = request.current_user['id']
+        now = datetime.utcnow()
+        
+        window_hours = request.args.get('window_hours', app.config['DUE_SOON_DEFAULT_HOURS'], type=int)
+        if window_hours <= 0 or window_hours > app.config['DUE_SOON_MAX_HOURS']:
+            return jsonify({'error': f"window_hours must be between 1 and {app.config['DUE_SOON_MAX_HOURS']}"}), 400
+        
+        query, error = build_due_tasks_query(user_id, now + timedelta(hours=window_hours), now)
+        if error:
+            return error
+        
+        page, error = paginate_due_tasks(query)
+        if error:
+            return error
+        
+        page['as_of'] = now.isoformat()
+        page['window_hours'] = window_hours
+        return jsonify(page)
+        
+    except Exception as e:
+        logger.error(f"Failed to get due-soon tasks: {e}")
+        return jsonify({'error': 'Failed to retrieve due-soon tasks'}), 500
+
 @app.route('/api/tasks/<int:task_id>', methods=['GET'])
 @token_required
 def get_task(task_id):
     """Get a specific task"""
     try:
         user_id = request.current_user['id']
-        task = Task.query.join(Project).filter(
-            Task.id == task_id,
-            Project.owner_id == user_id
-        ).first()
+        task_dict = load_owned_task(task_id, user_id)
+        if not task_dict and include_archived():
+            task_dict = load_owned_archived_task(task_id, user_id)
         
-        if not task:
+        if not task_dict:
             return jsonify({'error': 'Task not found'}), 404
         
-        return jsonify({'task': task.to_dict()})
+        return jsonify({'task': task_dict})
         
     except Exception as e:
         logger.error(f"Failed to get task {task_id}: {e}")
@@ -472,14 +1598,17 @@ def update_task(task_id):
             return jsonify({'error': 'Invalid JSON payload'}), 400
         
         user_id = request.current_user['id']
+        # Share lock on the project (see create_task) so the archiver cannot move the task while it is written
         task = Task.query.join(Project).filter(
             Task.id == task_id,
             Project.owner_id == user_id
-        ).first()
+        ).with_for_update(read=True, of=Project).first()
         
         if not task:
             return jsonify({'error': 'Task not found'}), 404
         
+        counted_before = (task.project_id, task.assignee_id, task.status)
+        
         # Update fields
         if 'title' in data:
             if not data['title'].strip():
@@ -540,7 +1669,16 @@ def update_task(task_id):
                 return jsonify({'error': 'Invalid due_date format. Use ISO format'}), 400
         
         task.updated_at = datetime.utcnow()
+        
+        counted_after = (task.project_id, task.assignee_id, task.status)
+        if counted_after != counted_before:
+            deltas = task_counter_deltas([counted_before], -1)
+            for key, delta in task_counter_deltas([counted_after], +1).items():
+                deltas[key] = deltas.get(key, 0) + delta
+            apply_task_counter_deltas(deltas)
+        
         db.session.commit()
+        bump_project_generation(task.project_id)
         
         log_activity(user_id, 'update', 'task', task.id, data)
         
@@ -560,17 +1698,26 @@ def delete_task(task_id):
     """Delete a task"""
     try:
         user_id = request.current_user['id']
+        # Share lock on the project (see create_task) so the archiver cannot move the task while it is written
         task = Task.query.join(Project).filter(
             Task.id == task_id,
             Project.owner_id == user_id
-        ).first()
+        ).with_for_update(read=True, of=Project).first()
         
         if not task:
             return jsonify({'error': 'Task not found'}), 404
         
         task_title = task.title
-        db.session.delete(task)
+        project_id = task.project_id
+        db.session.add(DeletedRecord(
+            entity_type='task', entity_id=task_id, project_id=project_id, owner_id=user_id
+        ))
+        apply_task_counter_deltas(task_counter_deltas([(project_id, task.assignee_id, task.status)], -1))
+        Task.query.filter_by(id=task_id).delete(synchronize_session=False)
         db.session.commit()
+        bump_project_generation(project_id)
+        
+        enqueue_dependent_cleanup([task_id])
         
         log_activity(user_id, 'delete', 'task', task_id, {'title': task_title})
         
@@ -583,30 +1730,60 @@ def delete_task(task_id):
 
 # Utility endpoint for other services
 @app.route('/api/tasks/<int:task_id>/verify', methods=['POST'])
-def verify_task_access():
+def verify_task_access(task_id):
     """Verify if a user has access to a task (for other services)"""
     try:
         data = request.get_json()
-        task_id = data.get('task_id')
         user_id = data.get('user_id')
         
-        if not task_id or not user_id:
+        if not user_id:
             return jsonify({'error': 'task_id and user_id required'}), 400
         
-        task = Task.query.join(Project).filter(
-            Task.id == task_id,
-            Project.owner_id == user_id
-        ).first()
+        # Archived tasks keep their comments and attachments readable
+        task_dict = load_owned_task(task_id, user_id) or load_owned_archived_task(task_id, user_id)
         
         return jsonify({
-            'has_access': task is not None,
-            'task': task.to_dict() if task else None
+            'has_access': task_dict is not None,
+            'task': task_dict
         })
         
     except Exception as e:
         logger.error(f"Failed to verify task access: {e}")
         return jsonify({'error': 'Failed to verify access'}), 500
 
+@app.route('/api/tasks/verify', methods=['POST'])
+def verify_tasks_access():
+    """Return which of many task ids a user has access to (for other services)"""
+    try:
+        data = request.get_json()
+        user_id = data.get('user_id') if data else None
+        task_ids = data.get('task_ids') if data else None
+        
+        if not user_id or not isinstance(task_ids, list):
+            return jsonify({'error': 'task_ids and user_id required'}), 400
+        
+        try:
+            task_ids = sorted({int(task_id) for task_id in task_ids})
+        except (TypeError, ValueError):
+            return jsonify({'error': 'task_ids must be integers'}), 400
+        
+        # Archived tasks stay accessible, as in the single-task check
+        accessible = []
+        for start in range(0, len(task_ids), 1000):
+            chunk = task_ids[start:start + 1000]
+            accessible.extend(task_id for (task_id,) in db.session.query(Task.id).join(Project).filter(
+                Task.id.in_(chunk), Project.owner_id == user_id
+            ))
+            accessible.extend(task_id for (task_id,) in db.session.query(ArchivedTask.id).join(ArchivedProject).filter(
+                ArchivedTask.id.in_(chunk), ArchivedProject.owner_id == user_id
+            ))
+        
+        return jsonify({'task_ids': sorted(accessible)})
+        
+    except Exception as e:
+        logger.error(f"Failed to verify access to tasks: {e}")
+        return jsonify({'error': 'Failed to verify access'}), 500
+
 @app.route('/health')
 def health_check():
     """Health check endpoint"""
@@ -646,6 +1823,14 @@ def internal_error(error):
     db.session.rollback()
     return jsonify({'error': 'Internal Server Error'}), 500
 
+@app.cli.command('prune-tombstones')
+def prune_tombstones():
+    """Delete change-feed tombstones older than the retention window"""
+    cutoff = datetime.utcnow() - timedelta(days=app.config['TOMBSTONE_RETENTION_DAYS'])
+    deleted_count = DeletedRecord.query.filter(DeletedRecord.deleted_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    logger.info(f"Pruned {deleted_count} tombstones older than {cutoff}")
+
 # Database initialization
 def init_db():
     """Initialize database"""
@@ -655,6 +1840,7 @@ def init_db():
 
 if __name__ == '__main__':
     init_db()
+    
     app.run(
         host=os.environ.get('HOST', '0.0.0.0'),
         port=int(os.environ.get('PORT', 5002)),
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the project/task hot-query indexes
+Builds a synthetic SQLite dataset, then prints the query plan and latency of the
+owner, project and assignee access paths before and after the indexes are created
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+STATUSES = ['pending', 'in_progress', 'completed', 'cancelled']
+PRIORITIES = ['low', 'medium', 'high', 'critical']
+
+SCHEMA = """
+CREATE TABLE projects (
+    id INTEGER PRIMARY KEY,
+    name VARCHAR(200) NOT NULL,
+    description TEXT,
+    status VARCHAR(20),
+    priority VARCHAR(10),
+    created_at DATETIME,
+    updated_at DATETIME,
+    owner_id INTEGER NOT NULL
+);
+CREATE TABLE tasks (
+    id INTEGER PRIMARY KEY,
+    title VARCHAR(200) NOT NULL,
+    description TEXT,
+    status VARCHAR(20),
+    priority VARCHAR(10),
+    due_date DATETIME,
+    created_at DATETIME,
+    updated_at DATETIME,
+    project_id INTEGER NOT NULL REFERENCES projects (id),
+    assignee_id INTEGER
+);
+"""
+
+# Must match migrations/versions/3af72101aafb_hot_query_indexes.py
+INDEXES = """
+CREATE INDEX ix_projects_owner_id_id ON projects (owner_id, id);
+CREATE INDEX ix_tasks_project_id_status ON tasks (project_id, status);
+CREATE INDEX ix_tasks_assignee_id_status_due_date ON tasks (assignee_id, status, due_date);
+"""
+
+QUERIES = {
+    'projects_by_owner': (
+        "SELECT * FROM projects WHERE owner_id = :owner_id ORDER BY id"
+    ),
+    'project_by_id_and_owner': (
+        "SELECT * FROM projects WHERE id = :project_id AND owner_id = :owner_id"
+    ),
+    'tasks_by_project': (
+        "SELECT * FROM tasks WHERE project_id = :project_id"
+    ),
+    'task_count_by_project_status': (
+        "SELECT status, COUNT(*) FROM tasks WHERE project_id = :project_id GROUP BY status"
+    ),
+    'overdue_for_assignee': (
+        "SELECT * FROM tasks WHERE assignee_id = :assignee_id "
+        "AND status IN ('pending', 'in_progress') AND due_date < :now"
+    ),
+}
+
+def populate(conn, task_count, tasks_per_project, projects_per_owner, assignee_count):
+    """Insert synthetic projects and tasks"""
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    project_count = max(1, task_count // tasks_per_project)
+
+    conn.executemany(
+        "INSERT INTO projects (id, name, status, priority, created_at, updated_at, owner_id) "
+        "VALUES (?, ?, 'active', 'medium', ?, ?, ?)",
+        ((i, f'Project {i}', now, now, i // projects_per_owner + 1) for i in range(1, project_count + 1))
+    )
+
+    def task_rows():
+        for i in range(1, task_count + 1):
+            due = now + timedelta(days=rng.randint(-60, 60))
+            yield (
+                i, f'Task {i}', rng.choice(STATUSES), rng.choice(PRIORITIES),
+                due.isoformat(' '), now, now,
+                rng.randint(1, project_count), rng.randint(1, assignee_count)
+            )
+
+    conn.executemany(
+        "INSERT INTO tasks (id, title, status, priority, due_date, created_at, updated_at, project_id, assignee_id) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        task_rows()
+    )
+    conn.commit()
+    return project_count
+
+def measure(conn, params, repeat):
+    """Return {query: (plan, median_ms)}"""
+    results = {}
+    for name, sql in QUERIES.items():
+        plan = '; '.join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            conn.execute(sql, params).fetchall()
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        results[name] = (plan, timings[len(timings) // 2])
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tasks', type=int, default=1_000_000)
+    parser.add_argument('--tasks-per-project', type=int, default=200)
+    parser.add_argument('--projects-per-owner', type=int, default=10)
+    parser.add_argument('--assignees', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, 'bench.db'))
+        conn.executescript(SCHEMA)
+
+        start = time.perf_counter()
+        project_count = populate(conn, args.tasks, args.tasks_per_project, args.projects_per_owner, args.assignees)
+        print(f"Populated {args.tasks} tasks / {project_count} projects in {time.perf_counter() - start:.1f}s")
+
+        params = {
+            'owner_id': 1,
+            'project_id': project_count // 2,
+            'assignee_id': args.assignees // 2,
+            'now': datetime.utcnow().isoformat(' ')
+        }
+
+        before = measure(conn, params, args.repeat)
+        conn.executescript(INDEXES)
+        conn.execute("ANALYZE")
+        after = measure(conn, params, args.repeat)
+        conn.close()
+
+    for name in QUERIES:
+        plan_before, ms_before = before[name]
+        plan_after, ms_after = after[name]
+        print(f"\n{name}")
+        print(f"  before: {ms_before:9.3f} ms  {plan_before}")
+        print(f"  after:  {ms_after:9.3f} ms  {plan_after}")
+
+if __name__ == '__main__':
+    main()
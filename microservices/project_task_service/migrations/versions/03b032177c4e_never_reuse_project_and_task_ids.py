@@ -0,0 +1,79 @@
+"""never reuse project and task ids
+
+Revision ID: 03b032177c4e
+Revises: f8e31465d02c
+Create Date: 2026-10-19 03:05:12.418207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '03b032177c4e'
+down_revision = 'f8e31465d02c'
+branch_labels = None
+depends_on = None
+
+OPEN_TASK_PREDICATE = "status IN ('pending', 'in_progress')"
+
+TASK_FTS_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN "
+    "INSERT INTO tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN "
+    "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF title, description ON tasks BEGIN "
+    "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+]
+
+
+def rebuild(table, autoincrement):
+    """Recreate a table with or without AUTOINCREMENT, keeping its partial indexes and FTS triggers"""
+    if table == 'tasks':
+        op.drop_index('ix_tasks_open_assignee_id_due_date', table_name='tasks')
+        op.drop_index('ix_tasks_open_project_id_due_date', table_name='tasks')
+        for trigger in ('tasks_fts_ai', 'tasks_fts_ad', 'tasks_fts_au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+
+    with op.batch_alter_table(table, recreate='always', table_kwargs={'sqlite_autoincrement': autoincrement}):
+        pass
+
+    if table == 'tasks':
+        op.create_index('ix_tasks_open_assignee_id_due_date', 'tasks', ['assignee_id', 'due_date', 'id'],
+                        sqlite_where=sa.text(OPEN_TASK_PREDICATE))
+        op.create_index('ix_tasks_open_project_id_due_date', 'tasks', ['project_id', 'due_date', 'id'],
+                        sqlite_where=sa.text(OPEN_TASK_PREDICATE))
+        for statement in TASK_FTS_TRIGGERS:
+            op.execute(statement)
+
+
+def upgrade():
+    # Postgres serial sequences never hand an id out twice; SQLite reuses the highest rowid once it is
+    # deleted (or archived) unless the table is declared AUTOINCREMENT
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    rebuild('projects', True)
+    rebuild('tasks', True)
+
+    # Start the counters above every id already handed out, including archived and deleted rows
+    for table, archive_table, entity_type in (('projects', 'archived_projects', 'project'),
+                                              ('tasks', 'archived_tasks', 'task')):
+        op.execute(f"DELETE FROM sqlite_sequence WHERE name = '{table}'")
+        op.execute(
+            f"INSERT INTO sqlite_sequence (name, seq) SELECT '{table}', max("
+            f"(SELECT coalesce(max(id), 0) FROM {table}), "
+            f"(SELECT coalesce(max(id), 0) FROM {archive_table}), "
+            f"(SELECT coalesce(max(entity_id), 0) FROM deleted_records WHERE entity_type = '{entity_type}'))"
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    rebuild('tasks', False)
+    rebuild('projects', False)
@@ -0,0 +1,61 @@
+"""task full text search
+
+Revision ID: e38b6d146661
+Revises: 5aeeb5c8a8a7
+Create Date: 2026-10-19 01:47:47.449784
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e38b6d146661'
+down_revision = '5aeeb5c8a8a7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute(
+            "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B')) STORED"
+        )
+        op.execute("CREATE INDEX IF NOT EXISTS ix_tasks_search_vector ON tasks USING GIN (search_vector)")
+    elif bind.dialect.name == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5("
+            "title, description, content='tasks', content_rowid='id', tokenize='porter unicode61')"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN "
+            "INSERT INTO tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN "
+            "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+            "VALUES ('delete', old.id, old.title, old.description); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF title, description ON tasks BEGIN "
+            "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+            "VALUES ('delete', old.id, old.title, old.description); "
+            "INSERT INTO tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END"
+        )
+        # Index existing rows
+        op.execute("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_tasks_search_vector")
+        op.execute("ALTER TABLE tasks DROP COLUMN IF EXISTS search_vector")
+    elif bind.dialect.name == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS tasks_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS tasks_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS tasks_fts_ai")
+        op.execute("DROP TABLE IF EXISTS tasks_fts")
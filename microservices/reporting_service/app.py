@@ -34,6 +34,7 @@ class Config:
     COMMENT_SERVICE_URL = os.environ.get('COMMENT_SERVICE_URL', 'http://localhost:5003')
     ATTACHMENT_SERVICE_URL = os.environ.get('ATTACHMENT_SERVICE_URL', 'http://localhost:5004')
     ACTIVITY_LOG_SERVICE_URL = os.environ.get('ACTIVITY_LOG_SERVICE_URL', 'http://localhost:5006')
+    COUNTS_BATCH_SIZE = 1000  # Task ids per batched count call (services reject more than MAX_BATCH_TASK_IDS)
 
 # Application setup
 app = Flask(__name__)
@@ -174,6 +175,32 @@ def get_service_data(service_url: str, endpoint: str, headers: dict = None) -> d
         logger.error(f"Error getting data from {service_url}{endpoint}: {e}")
         return None
 
+def post_service_data(service_url: str, endpoint: str, payload: dict, headers: dict = None) -> dict:
+    """Post a JSON payload to a service endpoint and return its JSON response"""
+    try:
+        response = requests.post(f"{service_url}{endpoint}", json=payload, headers=headers, timeout=30)
+        if response.status_code == 200:
+            return response.json()
+        else:
+            logger.error(f"Failed to post data to {service_url}{endpoint}: {response.status_code}")
+            return None
+    except Exception as e:
+        logger.error(f"Error posting data to {service_url}{endpoint}: {e}")
+        return None
+
+def fetch_task_counts(service_url: str, endpoint: str, task_ids: list):
+    """Per-task counts from a batched /counts endpoint, in chunks; returns (counts, complete)"""
+    counts = {task_id: 0 for task_id in task_ids}
+    complete = True
+    chunk_size = app.config['COUNTS_BATCH_SIZE']
+    for start in range(0, len(task_ids), chunk_size):
+        data = post_service_data(service_url, endpoint, {'task_ids': task_ids[start:start + chunk_size]})
+        if data is None:
+            complete = False
+            continue
+        counts.update({int(task_id): count for task_id, count in data.get('counts', {}).items()})
+    return counts, complete
+
 # Authentication decorator
 def token_required(f):
     @wraps(f)
@@ -261,26 +288,18 @@ def generate_project_report(self, report_id: int):
             priority = task.get('priority', 'medium')
             priority_counts[priority] = priority_counts.get(priority, 0) + 1
         
-        # Get comments count for each task
-        comment_counts = {}
-        attachment_counts = {}
-        
-        for task in tasks:
-            task_id = task['id']
-            
-            # Get comment count
-            comment_data = get_service_data(
-                app.config['COMMENT_SERVICE_URL'],
-                f'/api/comments/count/{task_id}'
-            )
-            comment_counts[task_id] = comment_data.get('comment_count', 0) if comment_data else 0
-            
-            # Get attachment count
-            attachment_data = get_service_data(
-                app.config['ATTACHMENT_SERVICE_URL'],
-                f'/api/attachments/count/{task_id}'
-            )
-            attachment_counts[task_id] = attachment_data.get('attachment_count', 0) if attachment_data else 0
+        # Get comment and attachment counts for all tasks in batched calls per service
+        task_ids = [task['id'] for task in tasks]
+        comment_counts, comments_complete = fetch_task_counts(
+            app.config['COMMENT_SERVICE_URL'], '/api/comments/counts', task_ids
+        )
+        attachment_counts, attachments_complete = fetch_task_counts(
+            app.config['ATTACHMENT_SERVICE_URL'], '/api/attachments/counts', task_ids
+        )
+        incomplete_counts = [name for name, complete in
+                             [('comments', comments_complete), ('attachments', attachments_complete)] if not complete]
+        if incomplete_counts:
+            logger.warning(f"Project report {project_id} is partial: missing {', '.join(incomplete_counts)} counts for some tasks")
         
         # Build comprehensive report
         report_data = {
@@ -302,11 +321,13 @@ def generate_project_report(self, report_id: int):
             'task_attachments': attachment_counts,
             'total_comments': sum(comment_counts.values()),
             'total_attachments': sum(attachment_counts.values()),
+            'partial': bool(incomplete_counts),
+            'incomplete_counts': incomplete_counts,
             'generated_at': datetime.utcnow().isoformat()
         }
         
-        # Cache in Redis if available
-        if redis_client:
+        # Cache in Redis if available (partial reports are not, so the next request retries the counts)
+        if redis_client and not incomplete_counts:
             try:
                 cache_key = f"project_report:{project_id}"
                 redis_client.setex(cache_key, 3600, json.dumps(report_data))  # 1 hour cache
@@ -713,15 +734,15 @@ def quick_dashboard():
         active_projects = len([p for p in projects if p.get('status') == 'active'])
         total_tasks = len(all_tasks)
         completed_tasks = len([t for t in all_tasks if t.get('status') == 'completed'])
-        overdue_tasks = []
         
-        # Check for overdue tasks
-        today = datetime.utcnow()
-        for task in all_tasks:
-            if task.get('due_date') and task.get('status') not in ['completed', 'cancelled']:
-                due_date = datetime.fromisoformat(task['due_date'].replace('Z', '+00:00'))
-                if due_date < today:
-                    overdue_tasks.append(task)
+        # Overdue tasks are served from the project-task service's open-task index
+        overdue_data = get_service_data(
+            app.config['PROJECT_TASK_SERVICE_URL'],
+            '/api/tasks/overdue?limit=5&include_total=true',
+            headers
+        )
+        overdue_tasks = overdue_data.get('tasks', []) if overdue_data else []
+        overdue_total = overdue_data.get('total', 0) if overdue_data else 0
         
         dashboard_metrics = {
             'user_id': user_id,
@@ -735,7 +756,7 @@ def quick_dashboard():
                 'completed': completed_tasks,
                 'pending': len([t for t in all_tasks if t.get('status') == 'pending']),
                 'in_progress': len([t for t in all_tasks if t.get('status') == 'in_progress']),
-                'overdue': len(overdue_tasks)
+                'overdue': overdue_total
             },
             'overdue_tasks': [
                 {
@@ -743,7 +764,7 @@ def quick_dashboard():
                     'title': t['title'],
                     'due_date': t['due_date'],
                     'project_id': t['project_id']
-                } for t in overdue_tasks[:5]  # Limit to 5 most recent
+                } for t in overdue_tasks  # Five longest-overdue tasks
             ],
             'generated_at': datetime.utcnow().isoformat()
         }
@@ -24,6 +24,7 @@ class Config:
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', secrets.token_hex(32))
     JWT_ACCESS_TOKEN_EXPIRES = os.environ.get('JWT_ACCESS_TOKEN_EXPIRES', timedelta(hours=24))
     ACTIVITY_LOG_SERVICE_URL = os.environ.get('ACTIVITY_LOG_SERVICE_URL', 'http://localhost:5006')
+    MAX_USER_LOOKUP_IDS = int(os.environ.get('MAX_USER_LOOKUP_IDS', 1000))  # User ids accepted by /api/users/lookup
 
 # Application setup
 app = Flask(__name__)
@@ -525,6 +526,29 @@ def get_user(user_id):
         logger.error(f"Failed to get user {user_id}: {e}")
         return jsonify({'error': 'Failed to get user'}), 500
 
+@app.route('/api/users/lookup', methods=['POST'])
+@jwt_required
+def lookup_users():
+    """Resolve many user ids to usernames in one call (for other services); unknown ids are left out"""
+    try:
+        data = request.get_json()
+        user_ids = data.get('user_ids') if data else None
+        if not isinstance(user_ids, list):
+            return jsonify({'error': 'user_ids must be a list'}), 400
+        if len(user_ids) > app.config['MAX_USER_LOOKUP_IDS']:
+            return jsonify({'error': f"At most {app.config['MAX_USER_LOOKUP_IDS']} user_ids per request"}), 400
+        try:
+            user_ids = {int(user_id) for user_id in user_ids}
+        except (TypeError, ValueError):
+            return jsonify({'error': 'user_ids must be integers'}), 400
+        
+        users = db.session.query(User.id, User.username).filter(User.id.in_(user_ids)).all() if user_ids else []
+        return jsonify({'users': {str(user_id): {'id': user_id, 'username': username} for user_id, username in users}})
+        
+    except Exception as e:
+        logger.error(f"Failed to look up users: {e}")
+        return jsonify({'error': 'Failed to look up users'}), 500
+
 @app.route('/api/users/me', methods=['GET'])
 @jwt_required
 def get_current_user():